@@ -1,3 +1,23 @@
 from django.test import TestCase
 
-# Create your tests here.
+from scheduler.models import Role
+from timetable.testing import QueryBudgetMixin
+
+
+class AccountsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    namespace = "accounts"
+    cases = {
+        "ldap_login": ("get", [], {}),
+        "view_profiles": ("get", [], {}),
+        "role": ("get", [], {}),
+        "role_affected": ("get", lambda: [Role.objects.get(name="User").pk], {}),
+    }
+    excluded = {
+        "ldap_logout": "ends the test session",
+        "create_profile": "mutating",
+        "update_profile": "mutating",
+        "delete_profile": "mutating",
+        "role_create": "mutating",
+        "role_update": "mutating",
+        "role_delete": "mutating",
+    }
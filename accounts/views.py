@@ -187,7 +187,7 @@ def role_delete(request, pk):
 @login_required(login_url='accounts:ldap_login')
 @admin_required
 def view_profiles(request):
-    users = User.objects.all().order_by("username")
+    users = User.objects.select_related("profile__role").order_by("username")
     roles = Role.objects.all().order_by("name")
 
     return render(request, 'accounts/profile_list.html', {
@@ -1,41 +1,151 @@
-// Updated JavaScript code - replace your existing JS file content with this
+// Course tooltip: one element on the body, driven by event delegation so it also
+// works for course items rendered client-side after a filter change
 document.addEventListener("DOMContentLoaded", function () {
-    // Create a tooltip element and append it to the body (not to individual course items)
     const tooltip = document.createElement("div");
     tooltip.className = "course-tooltip";
-    document.body.appendChild(tooltip); // Append to body instead of course item
-    
-    // List of all course items
-    const courses = document.querySelectorAll(".course-item");
-    
-    // Add event listeners to each course item
-    courses.forEach(course => {
-        course.addEventListener("mouseenter", (e) => {
-            const code = course.getAttribute("data-code");
-            const section = course.getAttribute("data-section");
-            const number = course.getAttribute("data-number");
-            const start = course.getAttribute("data-start");
-            const end = course.getAttribute("data-end");
-            const day = course.getAttribute("data-day");
-            const academic_year = course.getAttribute("data-academic-year")
-            const term = course.getAttribute("data-term")
-            tooltip.innerHTML = `${code} ${number} ${section} ${academic_year} ${term} <br> Start: ${start} <br> End: ${end} <br> Day: ${day}`;
-            tooltip.style.display = "block";
-            
-        });
+    document.body.appendChild(tooltip);
+
+    document.addEventListener("mouseover", (e) => {
+        const course = e.target.closest(".course-item");
+        if (!course || course.contains(e.relatedTarget)) return;
+        const d = course.dataset;
+        tooltip.innerHTML = `${d.code} ${d.number} ${d.section} ${d.academicYear} ${d.term} <br> Start: ${d.start} <br> End: ${d.end} <br> Day: ${d.day}`;
+        tooltip.style.display = "block";
+    });
+
+    document.addEventListener("mouseout", (e) => {
+        const course = e.target.closest(".course-item");
+        if (!course || course.contains(e.relatedTarget)) return;
+        tooltip.style.display = "none";
+    });
+
+    document.addEventListener("mousemove", (e) => {
+        if (tooltip.style.display === "block") {
+            tooltip.style.top = (e.clientY) + "px";
+            tooltip.style.left = (e.clientX + 50) + "px";
+        }
+    });
+});
+
+// Timetable grid: size and colour each course card from its data-* attributes
+function hexToRgba(hex, a) {
+    const m = /^#?([a-f\d]{2})([a-f\d]{2})([a-f\d]{2})$/i.exec(hex || "");
+    if (!m) return hex; // fallback to whatever was passed
+    const r = parseInt(m[1], 16), g = parseInt(m[2], 16), b = parseInt(m[3], 16);
+    return `rgba(${r}, ${g}, ${b}, ${a})`;
+}
+
+function styleCourseItems(root) {
+    root.querySelectorAll(".course-item").forEach(el => {
+        const { height: h, top: t, width: w, bg, z } = el.dataset;
 
-        course.addEventListener("mouseleave", () => {
-            tooltip.style.display = "none";
+        if (h) el.style.height = h + "px";
+        if (t) el.style.marginTop = t + "px";
+        if (w) el.style.width = w + "%";
+
+        // TRANSPARENCY + colored stripe
+        if (bg) {
+            el.style.backgroundColor = hexToRgba(bg, 0.35);     // translucent fill
+            el.style.borderLeft = `4px solid ${bg}`;            // solid accent bar
+        }
+        if (z) el.style.zIndex = z;
+    });
+}
+
+document.addEventListener("DOMContentLoaded", () => styleCourseItems(document));
+
+// Landing page: on Search, fetch the JSON layout and redraw the grid in place
+// instead of reloading the whole page. Falls back to a normal page load on errors
+// so the server can show its messages.
+document.addEventListener("DOMContentLoaded", function () {
+    const grid = document.getElementById("timetable-grid");
+    const form = document.getElementById("timetable-filters");
+    if (!grid || !form) return;
+
+    const DAYS = ["Mon", "Tues", "Wed", "Thurs", "Fri"];
+    const body = document.getElementById("timetable-body");
+    const noCourses = document.getElementById("no-courses");
+    const invalidCard = document.getElementById("invalid-courses");
+    const invalidBody = document.getElementById("invalid-courses-body");
+
+    function courseItem(c, day, width, z, overlap) {
+        const el = document.createElement("div");
+        el.className = "course-item" + (overlap ? " overlap" : "");
+        Object.assign(el.dataset, {
+            height: c.height, bg: c.color, top: c.top, width: width, left: 0, z: z,
+            code: c.code, number: c.number, start: c.start, end: c.end,
+            day: c.days.map(d => d[0]).join(","), section: c.section,
+            academicYear: c.year, term: c.term,
         });
-        
-        // Optional: Update tooltip position on mouse move for better UX
-        course.addEventListener("mousemove", (e) => {
-            if (tooltip.style.display === "block") {
-                tooltip.style.top = (e.clientY) + "px";
-                tooltip.style.left = (e.clientX + 50) + "px";
-            }
+        const label = document.createElement("strong");
+        label.textContent = `${c.code} ${c.number} ${c.section}`;
+        el.appendChild(label);
+        return el;
+    }
+
+    function cell(tag, className, text) {
+        const el = document.createElement(tag);
+        if (className) el.className = className;
+        if (text !== undefined) el.textContent = text;
+        return el;
+    }
+
+    function renderTimetable(data) {
+        const cells = {};  // "hour|day" -> <td>
+        const rows = data.hours.map(hour => {
+            const tr = document.createElement("tr");
+            tr.appendChild(cell("td", "time-col", `${hour}:00`));
+            DAYS.forEach(day => {
+                cells[`${hour}|${day}`] = tr.appendChild(cell("td", "course-cell"));
+            });
+            return tr;
         });
+
+        data.courses.forEach(c => c.days.forEach(([day, width, z, overlap]) => {
+            const td = cells[`${c.hour}|${day}`];
+            if (td) td.appendChild(courseItem(c, day, width, z, overlap));
+        }));
+
+        body.replaceChildren(...rows);
+        styleCourseItems(body);
+        noCourses?.classList.toggle("d-none", data.courses.length > 0);
+
+        invalidBody.replaceChildren(...data.invalid.map(c => {
+            const tr = document.createElement("tr");
+            [c.code, c.number, c.section, c.year, c.term].forEach(v => tr.appendChild(cell("td", "", v)));
+            return tr;
+        }));
+        invalidCard.classList.toggle("d-none", data.invalid.length === 0);
+
+        const calendarLink = document.getElementById("calendar-link");
+        if (calendarLink) {
+            calendarLink.href = data.calendar_url;
+            calendarLink.classList.remove("d-none");
+        }
+    }
+
+    form.addEventListener("submit", async (e) => {
+        // buttons with their own formaction (the xlsx export) submit normally
+        if (e.submitter?.hasAttribute("formaction")) return;
+        e.preventDefault();
+        const params = new URLSearchParams(new FormData(form));
+        params.set("search", "1");
+        const pageUrl = form.action + "?" + params.toString();
+
+        try {
+            const resp = await fetch(grid.dataset.layoutUrl + "?" + params.toString(), {
+                headers: { "Accept": "application/json" },
+            });
+            if (!resp.ok) throw new Error(resp.status);
+            renderTimetable(await resp.json());
+            history.pushState(null, "", pageUrl);
+        } catch (err) {
+            window.location.href = pageUrl;
+        }
     });
+
+    // the grid only reflects the latest search, so reload on back/forward
+    window.addEventListener("popstate", () => window.location.reload());
 });
 
 // Display dropdown selections
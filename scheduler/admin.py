@@ -1,3 +1,21 @@
 from django.contrib import admin
 
+from .models import FeasibilityReport
+
 # Register your models here.
+
+
+@admin.register(FeasibilityReport)
+class FeasibilityReportAdmin(admin.ModelAdmin):
+    """ read-only view of the last `manage.py check_feasibility` run """
+    list_display = ("program", "academic_year", "term", "status", "course_count", "conflicting_pairs",
+                    "unschedulable", "elapsed_ms", "checked_at")
+    list_filter = ("status", "academic_year", "term", "program__name")
+    list_select_related = ("program__name", "program__year_level", "academic_year", "term")
+    search_fields = ("program__name__name",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,240 @@
+'''
+Schedule data version and the process-local cache of computed timetable layouts.
+
+The version is a nanosecond timestamp stored in Django's cache framework, so every
+worker sharing that cache sees the same value. Receivers in scheduler.models bump it
+(after commit) whenever courses, programs or lookup rows change.
+
+Cached layouts are keyed on the normalized filter set plus the version they were
+computed from; when the version moves on, older entries are dropped. The cache is
+bounded and evicts the least recently used entry first.
+
+The same version drives conditional GET (a per-user ETag) on the read-only
+scheduler pages, so a reload with unchanged data is answered 304 before any
+queryset is built or template rendered.
+
+Small lookup tables (terms, codes, years, ...) have a version of their own per
+table, also in Django's cache. lookup_cache keeps each worker's copy of their rows
+until that table's version moves on, so a course edit does not reload them and a
+lookup edit reloads only its table. A request reads every table version at once,
+on first use, with one cache.get_many().
+
+cached_stream() keeps whole streamed bodies (the .ics feeds) in Django's cache
+under a key that includes the version, for clients that poll without ETags.
+'''
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.views.decorators.http import condition
+
+SCHEDULE_VERSION_KEY = "scheduler:schedule_version"
+
+
+def schedule_version():
+    return cache.get_or_set(SCHEDULE_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def _set_new_version():
+    cache.set(SCHEDULE_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+_bump_state = threading.local()
+
+
+def _set_pending_version():
+    # one write per commit, however many changes registered a bump
+    if getattr(_bump_state, "pending", False):
+        _bump_state.pending = False
+        _set_new_version()
+
+
+def bump_schedule_version():
+    # wait for the commit, so no worker caches rows from before the change under the new version
+    _bump_state.pending = True
+    transaction.on_commit(_set_pending_version)
+
+
+class LayoutCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _sync_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._sync_version(version)
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._sync_version(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+layout_cache = LayoutCache(getattr(settings, "TIMETABLE_LAYOUT_CACHE_SIZE", 128))
+
+
+def layout_cache_key(filters):
+    """ the timetable filters in a canonical, hashable form """
+    course_filters = tuple(sorted({
+        (f.get("code", ""), tuple(sorted(set(f.get("numbers", [])))))
+        for f in filters["course_filters"]
+    }))
+    return (
+        filters["year"],
+        tuple(sorted(set(filters["terms"]))),
+        course_filters,
+        filters["pname"],
+        # the year level only narrows a program search
+        filters["plevel"] if filters["pname"] else "",
+    )
+
+
+LOOKUP_VERSION_KEY = "scheduler:lookup_version:{table}"
+_lookup_tables = set()
+_lookup_state = threading.local()
+
+
+def track_lookup_table(model):
+    """ give `model`'s table a version; bump it with bump_lookup_version(model) on every change """
+    _lookup_tables.add(model._meta.db_table)
+
+
+def lookup_versions():
+    """
+    {table: version} of every tracked table. Inside a request the versions are read
+    once, in one get_many, and reused until the request ends or a bump commits.
+    """
+    memo = getattr(_lookup_state, "memo", None)
+    if memo:
+        return memo
+    keys = {LOOKUP_VERSION_KEY.format(table=table): table for table in _lookup_tables}
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        # add() keeps a version another worker set in the meantime
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        found.update(cache.get_many(missing))
+    versions = {keys[key]: version for key, version in found.items()}
+    if memo is not None:
+        memo.update(versions)
+    return versions
+
+
+def _set_lookup_versions():
+    tables = getattr(_lookup_state, "pending", set())
+    _lookup_state.pending = set()
+    if tables:
+        cache.set_many({LOOKUP_VERSION_KEY.format(table=table): time.time_ns() for table in tables}, timeout=None)
+    memo = getattr(_lookup_state, "memo", None)
+    if memo is not None:
+        memo.clear()
+
+
+def bump_lookup_version(model):
+    # like bump_schedule_version: once per table and commit, after the commit
+    if not hasattr(_lookup_state, "pending"):
+        _lookup_state.pending = set()
+    _lookup_state.pending.add(model._meta.db_table)
+    transaction.on_commit(_set_lookup_versions)
+
+
+def _start_lookup_memo(**kwargs):
+    _lookup_state.memo = {}
+
+
+def _end_lookup_memo(**kwargs):
+    _lookup_state.memo = None
+
+
+request_started.connect(_start_lookup_memo, dispatch_uid="scheduler_lookup_memo_start")
+request_finished.connect(_end_lookup_memo, dispatch_uid="scheduler_lookup_memo_end")
+
+
+class LookupCache:
+    """ rows of lookup querysets, each kept until its table's version changes """
+    def __init__(self):
+        self._entries = {}  # (table, SQL) -> (version, rows)
+        self._lock = threading.Lock()
+
+    def rows(self, queryset):
+        """ the queryset's rows as a list; the instances are shared, treat them as read-only """
+        table = queryset.model._meta.db_table
+        version = lookup_versions()[table]  # a KeyError for a table track_lookup_table was not given
+        key = (table, str(queryset.query))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        rows = list(queryset)
+        with self._lock:
+            self._entries[key] = (version, rows)
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+lookup_cache = LookupCache()
+
+
+def cached_stream(key, chunks, max_size=5 * 1024 * 1024, timeout=24 * 60 * 60):
+    """
+    Pass `chunks` (str) through and, once they have all been sent, store their
+    concatenation under `key`. A body over `max_size` characters is not cached.
+    Put the schedule version in the key: entries are never invalidated, only
+    superseded when the version moves on.
+    """
+    parts, size = [], 0
+    for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            parts.append(chunk)
+            if size > max_size:
+                parts = None
+        yield chunk
+    if parts is not None:
+        cache.set(key, "".join(parts), timeout)
+
+
+def _conditional_allowed(request):
+    # pending flash messages are rendered into the page, so never answer 304 over them
+    return len(get_messages(request)) == 0
+
+
+def schedule_etag(request, *args, **kwargs):
+    if not _conditional_allowed(request):
+        return None
+    # per user, and per CSRF secret so cached forms never carry a stale token
+    csrf = hashlib.sha256((request.META.get("CSRF_COOKIE") or "").encode()).hexdigest()[:12]
+    return f"{schedule_version()}-{request.user.pk}-{csrf}"
+
+
+# ETag from the schedule data version; stack it under @login_required. No Last-Modified:
+# If-Modified-Since carries only a date, so it would 304 a page rendered for another user
+schedule_condition = condition(etag_func=schedule_etag)
@@ -0,0 +1,190 @@
+'''
+Occupancy bitmaps for clash checks between courses.
+
+A course's weekly footprint is a single Python int: bit
+(day_index * MINUTES_PER_DAY + minute) is set for every minute it meets.
+Two courses clash exactly when their bitmaps share a bit, so a clash test is
+one AND and the overlapping minutes are a popcount, however long the courses are.
+'''
+import time
+from itertools import combinations
+
+from .layout import DAYS, MINUTES_PER_DAY
+
+
+def week_bitmap(day_names, start, end):
+    """ bitmap of [start, end) minutes on each of day_names; empty for a zero or inverted interval """
+    if end <= start:
+        return 0
+    span = ((1 << (end - start)) - 1) << start
+    bitmap = 0
+    for d in day_names:
+        bitmap |= span << (DAYS.index(d) * MINUTES_PER_DAY)
+    return bitmap
+
+
+def course_bitmap(course):
+    """
+    week_bitmap of a Course from its day_mask (bit i is DAYS[i], see models.DAY_BITS)
+    and loaded start/end_time, or None without days or valid times
+    """
+    start = getattr(course.start_time, "minutes_since_midnight", None)
+    end = getattr(course.end_time, "minutes_since_midnight", None)
+    if start is None or end is None or end <= start or not course.day_mask:
+        return None
+    return week_bitmap([d for i, d in enumerate(DAYS) if course.day_mask >> i & 1], start, end)
+
+
+def day_patterns(count):
+    """ every choice of `count` meeting days, in week order """
+    return [list(p) for p in combinations(DAYS, count)]
+
+
+def rank_placements(candidates, peers, limit=None):
+    """
+    candidates: iterable of (placement, bitmap); peers: iterable of (peer, bitmap).
+    Returns [(placement, conflicts, overlap_minutes, clashing_peers), ...] ordered
+    by conflicts, then overlap minutes; ties keep the candidates' input order.
+
+    Peers with identical bitmaps (e.g. sections sharing a slot) are scored once,
+    and a candidate missing the union of all peers is cleared with a single AND.
+    """
+    groups = {}
+    for peer, bitmap in peers:
+        if bitmap:
+            groups.setdefault(bitmap, []).append(peer)
+    occupied = 0
+    for bitmap in groups:
+        occupied |= bitmap
+
+    scored = []
+    for placement, bitmap in candidates:
+        clashing, overlap = [], 0
+        if bitmap & occupied:
+            for peer_bitmap, group in groups.items():
+                shared = bitmap & peer_bitmap
+                if shared:
+                    clashing.extend(group)
+                    overlap += shared.bit_count() * len(group)
+        scored.append((placement, len(clashing), overlap, clashing))
+
+    scored.sort(key=lambda s: (s[1], s[2]))
+    return scored if limit is None else scored[:limit]
+
+
+def find_combinations(groups, limit=None, time_budget=None):
+    """
+    groups: one list of (option, bitmap) per required course, e.g. its sections.
+    Picks one option from every group so that no two picked bitmaps clash.
+
+    Returns {"combinations": [[options, ...], ...], "exhausted": bool, "timed_out": bool}
+    where each combination holds, per group in input order, the list of options
+    sharing the picked bitmap (interchangeable sections are searched once).
+    Stops after `limit` combinations or `time_budget` seconds; `exhausted` is
+    True only when the whole search space was covered.
+
+    Backtracking with forward checking: after each pick, every remaining group
+    drops the options that clash with it, and a group left empty prunes the
+    branch at once. The next group is the one with the fewest options left, and
+    options clashing with the fewest options elsewhere are tried first.
+    """
+    domains = []
+    for options in groups:
+        merged = {}
+        for option, bitmap in options:
+            merged.setdefault(bitmap, []).append(option)
+        domains.append(list(merged.items()))
+
+    # least constraining first: how many options in other groups each one rules out
+    for i, domain in enumerate(domains):
+        others = [bitmap for j, other in enumerate(domains) if j != i for bitmap, _ in other]
+        domain.sort(key=lambda entry: sum(1 for bitmap in others if bitmap & entry[0]))
+
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    combinations_found = []
+    picked = [None] * len(domains)
+    timed_out = False
+
+    def search(remaining):
+        nonlocal timed_out
+        if not remaining:
+            combinations_found.append(list(picked))
+            return limit is not None and len(combinations_found) >= limit
+        if deadline is not None and time.monotonic() > deadline:
+            timed_out = True
+            return True
+
+        idx = min(remaining, key=lambda i: len(remaining[i]))
+        for bitmap, options in remaining[idx]:
+            narrowed = {}
+            for j, domain in remaining.items():
+                if j == idx:
+                    continue
+                compatible = [entry for entry in domain if not entry[0] & bitmap]
+                if not compatible:
+                    break
+                narrowed[j] = compatible
+            else:
+                picked[idx] = options
+                if search(narrowed):
+                    return True
+        return False
+
+    stopped = False
+    if all(domains):
+        stopped = search(dict(enumerate(domains)))
+    return {"combinations": combinations_found, "exhausted": not stopped, "timed_out": timed_out}
+
+
+def conflicting_pairs(groups):
+    """
+    groups: {label: [bitmap, ...]}. Returns the sorted (label, label) pairs where every
+    option of one clashes with every option of the other, i.e. the smallest sets of
+    required courses that can never be taken together.
+    """
+    distinct = {label: set(bitmaps) for label, bitmaps in groups.items()}
+    labels = sorted(distinct)
+    pairs = []
+    for i, a in enumerate(labels):
+        for b in labels[i + 1:]:
+            if all(x & y for x in distinct[a] for y in distinct[b]):
+                pairs.append((a, b))
+    return pairs
+
+
+def check_feasibility(groups, time_budget=None):
+    """
+    groups: {label: [(option, bitmap or None), ...]} for one program and term, where
+    None marks an option without days or times. Runs in worker processes, so it
+    only touches plain data.
+
+    Returns {"status": "feasible" | "infeasible" | "timeout", "courses": int,
+    "unschedulable": [label, ...], "conflicting_pairs": [[label, label], ...],
+    "example": [{"course": label, "options": [...]}, ...], "elapsed_ms": float}.
+    """
+    started = time.perf_counter()
+    placeable = {label: [(o, b) for o, b in options if b is not None] for label, options in groups.items()}
+    unschedulable = sorted(label for label, options in placeable.items() if not options)
+    labels = sorted(label for label in placeable if placeable[label])
+
+    result = {"combinations": [], "exhausted": True, "timed_out": False}
+    if not unschedulable:
+        result = find_combinations([placeable[label] for label in labels], limit=1, time_budget=time_budget)
+
+    if result["combinations"]:
+        status, pairs = "feasible", []
+        example = [{"course": label, "options": options}
+                   for label, options in zip(labels, result["combinations"][0])]
+    else:
+        status = "timeout" if result["timed_out"] else "infeasible"
+        pairs = [list(p) for p in conflicting_pairs({label: [b for _, b in placeable[label]] for label in labels})]
+        example = []
+
+    return {
+        "status": status,
+        "courses": len(groups),
+        "unschedulable": unschedulable,
+        "conflicting_pairs": pairs,
+        "example": example,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -0,0 +1,209 @@
+'''
+Streaming exports of course search results.
+
+Rows are read with values_list(...).iterator(chunk_size=...), so related names
+come from the one joined query and no model instances are built; CSV is yielded
+line by line and XLSX rows go through openpyxl's write-only mode, which spools
+them to a temporary file. Memory stays flat however many rows are exported.
+
+The header matches the import columns, so an export can be edited and imported again.
+
+write_timetable_xlsx() is the weekly grid of the landing page instead: one
+sheet per term, a column per day and a row per SLOT_MINUTES, each course a
+merged block in its code's colour. A course the day's overlap sweep put at
+depth k goes to the k-th column of that day when it is free, otherwise to the
+lowest free one, so a day is only as wide as its deepest overlap.
+'''
+import csv
+import heapq
+import re
+import tempfile
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+
+from .layout import DAYS
+from .models import day_names_for
+
+HEADER = ["Course Code", "Number", "Section", "Term", "Academic Year", "Days", "Start Time", "End Time"]
+FIELDS = ["code__name", "number__name", "section__name", "term__name", "academic_year__name",
+          "day_mask", "start_time__name", "end_time__name"]
+CHUNK_SIZE = 2000
+
+
+def export_rows(courses, chunk_size=CHUNK_SIZE):
+    """ one list of cell values per course, in HEADER order """
+    for row in courses.values_list(*FIELDS).iterator(chunk_size=chunk_size):
+        row = ["" if value is None else value for value in row]
+        row[5] = ", ".join(day_names_for(row[5] or 0))
+        yield row
+
+
+class _Echo:
+    """ file-like object whose write() hands the line back, for csv.writer """
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows, title="Courses"):
+    """ write the rows to a temporary .xlsx and return the open file, positioned at the start """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    out = tempfile.TemporaryFile()
+    wb.save(out)
+    out.seek(0)
+    return out
+
+
+SLOT_MINUTES = 10
+UNSCHEDULED_HEADER = ["Course Code", "Number", "Section", "Term", "Academic Year"]
+_CARD_BORDER = Border(*(Side(style="thin", color="666666"),) * 4)
+
+
+def _fill(color):
+    """ a solid fill for "#RRGGBB" / "#RGB" colours; anything else stays unfilled """
+    hex_digits = (color or "").lstrip("#")
+    if len(hex_digits) == 3:
+        hex_digits = "".join(ch * 2 for ch in hex_digits)
+    if not re.fullmatch(r"[0-9A-Fa-f]{6}", hex_digits):
+        return None
+    return PatternFill("solid", start_color=hex_digits.upper(), end_color=hex_digits.upper())
+
+
+def _sheet_title(name, used):
+    """ Excel sheet names: at most 31 characters, none of []:*?/\\, unique in the workbook """
+    base = re.sub(r"[\[\]:*?/\\]", "-", name or "None")[:31] or "None"
+    title, n = base, 2
+    while title in used:
+        suffix = f" ({n})"
+        title, n = base[:31 - len(suffix)] + suffix, n + 1
+    used.add(title)
+    return title
+
+
+def _place_cards(cards, first_minute, slots, slot_minutes):
+    """
+    cards: [{"text", "color", "start", "end", "days": {day: depth}}, ...] in minutes.
+    Returns ({day: column count}, [(day, column, first row, last row, card), ...]).
+    """
+    spans = {d: [] for d in DAYS}
+    for card in cards:
+        first = (card["start"] - first_minute) // slot_minutes
+        last = min(-(-(card["end"] - first_minute) // slot_minutes), slots) - 1
+        if first < 0 or first >= slots:
+            continue  # the HTML grid has no row for it either
+        for day, depth in card["days"].items():
+            spans[day].append((depth, first, max(last, first), card))
+
+    columns, placed = {}, []
+    for day in DAYS:
+        # interval partitioning swept in start order: busy holds (last row, column) of open cards,
+        # free the columns whose card has ended (entries go stale once a column is reused)
+        busy, free, is_free = [], [], []
+        for depth, first, last, card in sorted(spans[day], key=lambda s: (s[1], s[0])):
+            while busy and busy[0][0] < first:
+                col = heapq.heappop(busy)[1]
+                is_free[col] = True
+                heapq.heappush(free, col)
+            if depth < len(is_free) and is_free[depth]:
+                col = depth
+            else:
+                while free and not is_free[free[0]]:
+                    heapq.heappop(free)
+                col = heapq.heappop(free) if free else len(is_free)
+                if col == len(is_free):
+                    is_free.append(False)
+            is_free[col] = False
+            heapq.heappush(busy, (last, col))
+            placed.append((day, col, first, last, card))
+        columns[day] = max(len(is_free), 1)
+    return columns, placed
+
+
+def _write_grid(wb, title, cards, hours, slot_minutes):
+    first_minute = int(hours[0]) * 60
+    slots = (int(hours[-1]) + 1) * 60 // slot_minutes - first_minute // slot_minutes
+    columns, placed = _place_cards(cards, first_minute, slots, slot_minutes)
+
+    ws = wb.create_sheet(title)
+    day_col = {}
+    col = 2
+    for day in DAYS:
+        day_col[day] = col
+        col += columns[day]
+    ws.column_dimensions["A"].width = 8
+    for c in range(2, col):
+        ws.column_dimensions[get_column_letter(c)].width = 16
+    ws.freeze_panes = "B2"
+
+    # only a card's top cell holds its text and style; Excel draws a merged block from it
+    cells, merged, fills = {}, [], {}
+    for day, sub, first, last, card in placed:
+        c = day_col[day] + sub
+        if card["color"] not in fills:
+            fills[card["color"]] = _fill(card["color"])
+        cells[(first, c)] = (card["text"], fills[card["color"]])
+        if last > first:
+            merged.append(CellRange(min_col=c, min_row=first + 2, max_col=c, max_row=last + 2))
+
+    header = [WriteOnlyCell(ws, value="Time")]
+    for day in DAYS:
+        header.extend([WriteOnlyCell(ws, value=day)] + [None] * (columns[day] - 1))
+        if columns[day] > 1:
+            merged.append(CellRange(min_col=day_col[day], min_row=1, max_col=day_col[day] + columns[day] - 1, max_row=1))
+    # built in one go: MultiCellRange.add() checks every existing range first
+    ws.merged_cells = MultiCellRange(merged)
+    for cell in header:
+        if cell is not None:
+            cell.font = Font(bold=True)
+            cell.alignment = Alignment(horizontal="center")
+    ws.append(header)
+
+    wrap = Alignment(wrap_text=True, vertical="top")
+    for r in range(slots):
+        minute = first_minute + r * slot_minutes
+        row = [f"{minute // 60:02d}:{minute % 60:02d}"] + [None] * (col - 2)
+        for c in range(2, col):
+            if (r, c) in cells:
+                text, fill = cells[(r, c)]
+                cell = WriteOnlyCell(ws, value=text)
+                cell.alignment, cell.border = wrap, _CARD_BORDER
+                if fill is not None:
+                    cell.fill = fill
+                row[c - 1] = cell
+        ws.append(row)
+
+
+def write_timetable_xlsx(terms, hours, slot_minutes=SLOT_MINUTES):
+    """
+    terms: iterable of (term name, cards, unscheduled rows); see _place_cards for
+    the cards. hours: the grid's hour labels, e.g. ["08", ..., "21"].
+    Returns an open temporary .xlsx file positioned at the start.
+    """
+    wb = Workbook(write_only=True)
+    used, unscheduled = set(), []
+    for name, cards, invalid in terms:
+        _write_grid(wb, _sheet_title(name, used), cards, hours, slot_minutes)
+        unscheduled.extend(invalid)
+    if unscheduled:
+        ws = wb.create_sheet(_sheet_title("Unscheduled", used))
+        ws.append(UNSCHEDULED_HEADER)
+        for row in unscheduled:
+            ws.append(row)
+    out = tempfile.TemporaryFile()
+    wb.save(out)
+    out.seek(0)
+    return out
@@ -6,38 +6,65 @@ from .models import (
 )
 from .models import ProgramName
 from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
+from .caching import lookup_cache
+
+
+class CachedChoiceIterator(ModelChoiceIterator):
+    """ choices from caching.lookup_cache instead of a query per rendered field """
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in lookup_cache.rows(self.queryset):
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(lookup_cache.rows(self.queryset)) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(lookup_cache.rows(self.queryset))
+
+
+# helper: the lookup dropdowns render from the cache; submitted values are still checked against the table
+class CachedModelChoiceField(forms.ModelChoiceField):
+    iterator = CachedChoiceIterator
+
+
+class CachedModelMultipleChoiceField(forms.ModelMultipleChoiceField):
+    iterator = CachedChoiceIterator
+
 
 class CourseForm(forms.ModelForm):
     # Required dropdowns (add * in labels)
-    code          = forms.ModelChoiceField(
+    code          = CachedModelChoiceField(
         queryset=CourseCode.objects.all().order_by("name"),
         required=True, empty_label="Select Code",
         label="Code *",
         widget=forms.Select(attrs={"class": "form-select"}),
         error_messages={"required": "Code field is required."},
     )
-    number        = forms.ModelChoiceField(
+    number        = CachedModelChoiceField(
         queryset=CourseNumber.objects.all().order_by("name"),
         required=True, empty_label="Select Number",
         label="Number *",
         widget=forms.Select(attrs={"class": "form-select"}),
         error_messages={"required": "Number field is required."},
     )
-    section       = forms.ModelChoiceField(
+    section       = CachedModelChoiceField(
         queryset=CourseSection.objects.all().order_by("name"),
         required=True, empty_label="Select Section",
         label="Section *",
         widget=forms.Select(attrs={"class": "form-select"}),
         error_messages={"required": "Section field is required."},
     )
-    term          = forms.ModelChoiceField(
+    term          = CachedModelChoiceField(
         queryset=CourseTerm.objects.all().order_by("name"),
         required=True, empty_label="Select Term",
         label="Term *",
         widget=forms.Select(attrs={"class": "form-select"}),
         error_messages={"required": "Term field is required."},
     )
-    academic_year = forms.ModelChoiceField(
+    academic_year = CachedModelChoiceField(
         queryset=CourseYear.objects.all().order_by("name"),
         required=True, empty_label="Select Year",
         label="Academic Year *",
@@ -46,19 +73,19 @@ class CourseForm(forms.ModelForm):
     )
 
     # Optional dropdowns
-    day = forms.ModelMultipleChoiceField(
+    day = CachedModelMultipleChoiceField(
         queryset=CourseDay.objects.filter(name__in=["Mon", "Tues", "Wed", "Thurs", "Fri"]).order_by("id"),
         required=False,
         widget=forms.CheckboxSelectMultiple,   # renders 5 checkboxes
         label="Days"
     )
-    start_time = forms.ModelChoiceField(
-        queryset=CourseTime.objects.all().order_by("name"),
+    start_time = CachedModelChoiceField(
+        queryset=CourseTime.objects.all().order_by("minutes_since_midnight", "name"),
         required=False, empty_label="Select Start Time",
         widget=forms.Select(attrs={"class": "form-select"})
     )
-    end_time   = forms.ModelChoiceField(
-        queryset=CourseTime.objects.all().order_by("name"),
+    end_time   = CachedModelChoiceField(
+        queryset=CourseTime.objects.all().order_by("minutes_since_midnight", "name"),
         required=False, empty_label="Select End Time",
         widget=forms.Select(attrs={"class": "form-select"})
     )
@@ -75,9 +102,9 @@ class CourseForm(forms.ModelForm):
         start = cleaned.get("start_time")
         end   = cleaned.get("end_time")
         if start and end:
-                s = datetime.strptime(start.name[:5], "%H:%M")
-                e = datetime.strptime(end.name[:5], "%H:%M")
-                if not e > s:
+                s = start.minutes_since_midnight
+                e = end.minutes_since_midnight
+                if s is None or e is None or not e > s:
                     raise ValidationError(
                         "End time must be later than start time."
                     )
@@ -0,0 +1,167 @@
+'''
+iCalendar (RFC 5545) feed of a timetable filter set.
+
+Every course-day becomes one weekly VEVENT with an RRULE bounded by its term's
+dates, so a term is a handful of lines per course however many weeks it runs.
+Courses are read straight from the filtered queryset as plain values; no layout
+is computed. Terms are not dated in the database: their first and last day come
+from settings.TIMETABLE_TERM_DATES, and courses of undated terms are left out.
+
+Course times are wall-clock times in settings.TIMETABLE_TIME_ZONE (not the
+server's TIME_ZONE, which is usually UTC). Every DTSTART/DTEND names that zone,
+and the feed carries a VTIMEZONE describing its offset changes over the dated
+years, so clients need not know the zone themselves.
+'''
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from .layout import DAYS
+from .models import day_names_for
+
+FIELDS = ["id", "code__name", "number__name", "section__name", "term__name", "academic_year__name",
+          "start_time__minutes_since_midnight", "end_time__minutes_since_midnight", "day_mask"]
+
+
+DEFAULT_TIME_ZONE = "America/Vancouver"
+
+
+def timetable_time_zone():
+    return getattr(settings, "TIMETABLE_TIME_ZONE", DEFAULT_TIME_ZONE)
+
+
+def term_dates(year, term):
+    """ (first day, last day) of a term from settings.TIMETABLE_TERM_DATES, or None """
+    dates = getattr(settings, "TIMETABLE_TERM_DATES", {}).get(year, {}).get(term)
+    if not dates:
+        return None
+    return date.fromisoformat(dates[0]), date.fromisoformat(dates[1])
+
+
+def escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n"))
+
+
+def fold(line):
+    """ content lines are limited to 75 octets; longer ones continue on lines starting with a space """
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start = [], 0
+    while start < len(data):
+        end = min(start + (75 if not parts else 74), len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # never split a UTF-8 sequence
+            end -= 1
+        parts.append(data[start:end].decode())
+        start = end
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _offset(delta):
+    minutes = int(delta.total_seconds() // 60)
+    sign = "-" if minutes < 0 else "+"
+    return f"{sign}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}"
+
+
+def _transitions(tz, first_year, last_year):
+    """ (UTC instant, offset before, offset after) of every offset change in the years, to the minute """
+    t = datetime(first_year, 1, 1, tzinfo=dt_timezone.utc)
+    end = datetime(last_year + 1, 1, 1, tzinfo=dt_timezone.utc)
+    before = t.astimezone(tz).utcoffset()
+    while t < end:
+        later = t + timedelta(days=1)
+        after = later.astimezone(tz).utcoffset()
+        if after != before:
+            lo, hi = t, later
+            while hi - lo > timedelta(minutes=1):
+                mid = lo + (hi - lo) / 2
+                if mid.astimezone(tz).utcoffset() == before:
+                    lo = mid
+                else:
+                    hi = mid
+            hi = hi.replace(second=0, microsecond=0)
+            yield hi, before, after
+            before = after
+        t = later
+
+
+def timezone_lines(tz_name, first_year, last_year):
+    """ a VTIMEZONE with one STANDARD/DAYLIGHT observance per offset change in the years """
+    tz = ZoneInfo(tz_name)
+    lines = ["BEGIN:VTIMEZONE", f"TZID:{tz_name}"]
+    changes = list(_transitions(tz, first_year, last_year))
+    if not changes:
+        start = datetime(first_year, 1, 1, tzinfo=tz)
+        changes = [(start.astimezone(dt_timezone.utc), start.utcoffset(), start.utcoffset())]
+    for instant, before, after in changes:
+        local = instant.astimezone(tz)
+        kind = "DAYLIGHT" if local.dst() else "STANDARD"
+        lines += [
+            f"BEGIN:{kind}",
+            # onset in the local time that was in effect before the change
+            f"DTSTART:{(instant + before).replace(tzinfo=None):%Y%m%dT%H%M%S}",
+            f"TZOFFSETFROM:{_offset(before)}",
+            f"TZOFFSETTO:{_offset(after)}",
+            f"TZNAME:{local.tzname()}",
+            f"END:{kind}",
+        ]
+    return lines + ["END:VTIMEZONE"]
+
+
+def _dated_years():
+    years = [int(d[:4]) for terms in getattr(settings, "TIMETABLE_TERM_DATES", {}).values()
+             for dates in terms.values() for d in dates]
+    return (min(years), max(years)) if years else None
+
+
+def calendar_lines(courses, name, host="timetable"):
+    """
+    courses: a Course queryset (e.g. timetable_queryset(filters)). Yields the folded
+    lines of a VCALENDAR, one chunk per event, reading the courses in batches.
+    """
+    tz_name = timetable_time_zone()
+    tz = ZoneInfo(tz_name)
+    stamp = datetime.now(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    years = _dated_years()
+    yield "".join(map(fold, [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//course-timetable//scheduler//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape(name)}",
+        f"X-WR-TIMEZONE:{tz_name}",
+        *(timezone_lines(tz_name, *years) if years else []),
+    ]))
+
+    dated = {}
+    for (pk, code, number, section, term, year, start, end, mask) in (
+            courses.values_list(*FIELDS).iterator(chunk_size=2000)):
+        if start is None or end is None or end <= start or not mask:
+            continue
+        if (year, term) not in dated:
+            dated[(year, term)] = term_dates(year, term)
+        if dated[(year, term)] is None:
+            continue
+        first_day, last_day = dated[(year, term)]
+        # RRULE UNTIL is in UTC when DTSTART carries a TZID
+        until = datetime.combine(last_day, time(23, 59, 59), tz).astimezone(dt_timezone.utc)
+        summary = f"{code} {number} {section}"
+
+        for day in day_names_for(mask):
+            first = first_day + timedelta(days=(DAYS.index(day) - first_day.weekday()) % 7)
+            if first > last_day:
+                continue
+            yield "".join(map(fold, [
+                "BEGIN:VEVENT",
+                f"UID:course-{pk}-{day.lower()}@{host}",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART;TZID={tz_name}:{first:%Y%m%d}T{start // 60:02d}{start % 60:02d}00",
+                f"DTEND;TZID={tz_name}:{first:%Y%m%d}T{end // 60:02d}{end % 60:02d}00",
+                f"RRULE:FREQ=WEEKLY;UNTIL={until:%Y%m%dT%H%M%SZ}",
+                f"SUMMARY:{escape(summary)}",
+                f"DESCRIPTION:{escape(f'{summary}, {term} {year}')}",
+                "END:VEVENT",
+            ]))
+    yield fold("END:VCALENDAR")
@@ -0,0 +1,441 @@
+'''
+Spreadsheet import of course schedules.
+
+    plan = plan_import(read_schedule(upload, upload.name))   # validates, never writes
+    apply_import(plan)                                       # one transaction
+
+Rows are validated column-wise with pandas, so a few thousand rows cost a
+handful of vectorized passes rather than a form per row. Missing lookup rows
+(codes, numbers, sections, terms, years, times) are created in bulk, and
+courses are inserted with bulk_create: their pks are reserved up front so each
+slug is final on insert, without Course.save()'s second write.
+
+With plan_import(df, sync=True) the file is treated as the source of truth for
+the (year, term) pairs it covers: rows are matched to stored courses on KEY,
+compared by a hash of their times and days, and only changed courses are
+written; delete_missing=True also removes the stored courses the file dropped.
+'''
+import hashlib
+import os
+
+import pandas as pd
+from django.db import connection, transaction
+from django.db.transaction import TransactionManagementError
+from django.db.models import Max
+
+from .caching import bump_lookup_version, bump_schedule_version
+from .layout import DAYS
+from .models import (
+    Course, CourseCode, CourseDay, CourseNumber, CourseSearch, CourseSection, CourseTerm, CourseTime, CourseYear,
+    DAY_BITS, day_names_for, queue_course_refresh, search_row_for,
+)
+
+COLUMNS = ["code", "number", "section", "term", "year", "days", "start", "end"]
+KEY = ["code", "number", "section", "year", "term"]  # Course.unique_together, by name
+
+# accepted header spellings, compared lower-cased with spaces/underscores removed
+COLUMN_ALIASES = {
+    "coursecode": "code", "subject": "code",
+    "coursenumber": "number", "catalognumber": "number",
+    "coursesection": "section",
+    "courseterm": "term",
+    "academicyear": "year",
+    "day": "days",
+    "starttime": "start",
+    "endtime": "end",
+}
+
+DAY_ALIASES = {}
+for _day, _aliases in {
+    "Mon": ["m", "mon", "monday"],
+    "Tues": ["t", "tu", "tue", "tues", "tuesday"],
+    "Wed": ["w", "wed", "wednesday"],
+    "Thurs": ["r", "th", "thu", "thur", "thurs", "thursday"],
+    "Fri": ["f", "fri", "friday"],
+}.items():
+    DAY_ALIASES.update({alias: _day for alias in _aliases})
+
+LOOKUPS = [
+    # (column, model, label)
+    ("code", CourseCode, "Code"),
+    ("number", CourseNumber, "Number"),
+    ("section", CourseSection, "Section"),
+    ("term", CourseTerm, "Term"),
+    ("year", CourseYear, "Academic Year"),
+]
+COURSE_LOOKUP_MAX_LENGTH = {column: model._meta.get_field("name").max_length for column, model, _ in LOOKUPS}
+
+
+class ScheduleImportError(Exception):
+    """ the file cannot be read as a schedule at all (as opposed to invalid rows) """
+
+
+# helper: name -> row for every name, creating the missing ones in one bulk insert
+def resolve_lookups(model, names, build=None):
+    build = build or (lambda name: model(name=name))
+    rows = {obj.name: obj for obj in model.objects.filter(name__in=names)}
+    missing = [build(name) for name in names if name not in rows]
+    if missing:
+        model.objects.bulk_create(missing)
+        bump_lookup_version(model)  # no post_save from bulk_create
+        rows.update({obj.name: obj for obj in model.objects.filter(name__in=[m.name for m in missing])})
+    return rows
+
+
+# helper: "HH:MM" -> CourseTime for every name, matched on minutes so a stored "9:00" serves "09:00"
+def resolve_times(names):
+    minutes = {name: int(name[:2]) * 60 + int(name[3:]) for name in names}
+    by_minutes = {}
+    for obj in CourseTime.objects.filter(minutes_since_midnight__in=set(minutes.values())).order_by("pk"):
+        by_minutes.setdefault(obj.minutes_since_midnight, obj)
+    missing = sorted({name for name, m in minutes.items() if m not in by_minutes})
+    if missing:
+        CourseTime.objects.bulk_create([CourseTime(name=name, minutes_since_midnight=minutes[name])
+                                        for name in missing])
+        bump_lookup_version(CourseTime)  # no post_save from bulk_create
+        by_minutes.update((obj.minutes_since_midnight, obj) for obj in CourseTime.objects.filter(name__in=missing))
+    return {name: by_minutes[m] for name, m in minutes.items()}
+
+
+def code_color(name, taken):
+    """ a stable colour for a new course code, derived from its name and unique among `taken` """
+    n = int(hashlib.sha256(name.encode()).hexdigest()[:6], 16)
+    while f"#{n:06X}" in taken:
+        n = (n + 1) % 0x1000000
+    taken.add(f"#{n:06X}")
+    return f"#{n:06X}"
+
+
+def reserve_course_pks(count):
+    """
+    `count` fresh Course pks, so slugs can be built before the rows are inserted.
+    Other backends than PostgreSQL have no sequence to draw from, so the pks follow
+    MAX(pk): call this inside the transaction that inserts them, which then holds
+    the Course table against other writers until it ends, so a concurrent import
+    waits instead of reserving the same ids.
+    """
+    if count <= 0:
+        return []
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [Course._meta.db_table, count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+    if not connection.in_atomic_block:
+        raise TransactionManagementError("reserve_course_pks() must run in the transaction that inserts the courses.")
+    if connection.vendor == "sqlite":
+        # any write, even one matching no row, takes SQLite's single write lock before MAX is read
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {connection.ops.quote_name(Course._meta.db_table)} SET id = id WHERE 0 = 1")
+        top = Course.objects.aggregate(top=Max("pk"))["top"]
+    else:
+        # MySQL locks the last row and the gap after it, so other inserts wait for this transaction
+        top = Course.objects.select_for_update().order_by("-pk").values_list("pk", flat=True).first()
+    # SQLite and MySQL move their counters past explicitly inserted ids
+    start = (top or 0) + 1
+    return list(range(start, start + count))
+
+
+def insert_rows(model, columns, rows, batch_size=2000):
+    """
+    INSERT `rows` (tuples of column values in `columns` order) into model's table,
+    one executemany per batch. For rows with no save() logic or defaults to fill:
+    bulk_create compiles SQL for every value, which costs more than the inserts
+    themselves at 100k rows, and SQLite caps it at 999 parameters per statement.
+    """
+    quote = connection.ops.quote_name
+    sql = (f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(map(quote, columns))}) "
+           f"VALUES ({', '.join(['%s'] * len(columns))})")
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[i:i + batch_size])
+
+
+def insert_courses(courses, day_names, batch_size=2000):
+    """
+    Bulk insert unsaved courses (related rows attached) and their day rows.
+    day_names: one list of day names per course. Sets pk, slug and day_mask on
+    each course; bulk inserts skip the model signals, so the search rows are
+    written and the schedule version is bumped here.
+    """
+    days = resolve_lookups(CourseDay, DAYS)
+    for course, pk, names in zip(courses, reserve_course_pks(len(courses)), day_names):
+        course.pk = pk
+        course.slug = course.build_slug()
+        course.day_mask = sum(DAY_BITS[d] for d in set(names))
+    Course.objects.bulk_create(courses, batch_size=batch_size)
+
+    # the day and search rows are plain column values; executemany skips compiling SQL per row
+    insert_rows(Course.day.through, ["course_id", "courseday_id"],
+                [(c.pk, days[d].pk) for c, names in zip(courses, day_names) for d in names], batch_size)
+    search_fields = CourseSearch._meta.concrete_fields
+    insert_rows(CourseSearch, [f.column for f in search_fields],
+                [tuple(getattr(row, f.attname) for f in search_fields) for row in map(search_row_for, courses)],
+                batch_size)
+    bump_schedule_version()
+    return courses
+
+
+def _header(name):
+    key = str(name).strip().lower().replace(" ", "").replace("_", "")
+    return COLUMN_ALIASES.get(key, key)
+
+
+def read_schedule(source, filename):
+    """ DataFrame of the COLUMNS as stripped strings, indexed by spreadsheet row number """
+    ext = os.path.splitext(filename)[1].lower()
+    try:
+        if ext == ".csv":
+            df = pd.read_csv(source, dtype=str, keep_default_na=False)
+        elif ext in (".xlsx", ".xlsm"):
+            df = pd.read_excel(source, dtype=str, engine="openpyxl").fillna("")
+        else:
+            raise ScheduleImportError("Upload a .csv or .xlsx file.")
+    except (ValueError, UnicodeDecodeError, KeyError) as exc:
+        raise ScheduleImportError(f"The file could not be read: {exc}")
+
+    df.columns = [_header(c) for c in df.columns]
+    missing = [c for c in COLUMNS if c not in df.columns]
+    if missing:
+        raise ScheduleImportError(f"Missing column(s): {', '.join(missing)}.")
+    df = df[COLUMNS].astype(str).apply(lambda col: col.str.strip())
+    df.index = df.index + 2  # the header is row 1
+    return df
+
+
+def _parse_times(column):
+    """ "H:MM" / "HH:MM[:SS]" -> (minutes or NaN, "HH:MM" or "") """
+    parts = column.str.extract(r"^(\d{1,2}):(\d{2})(?::\d{2})?$")
+    hours, mins = pd.to_numeric(parts[0]), pd.to_numeric(parts[1])
+    minutes = (hours * 60 + mins).where((hours < 24) & (mins < 60))
+    names = pd.Series("", index=column.index)
+    ok = minutes.notna()
+    names[ok] = ((minutes[ok] // 60).astype(int).astype(str).str.zfill(2) + ":"
+                 + (minutes[ok] % 60).astype(int).astype(str).str.zfill(2))
+    return minutes, names
+
+
+def _parse_days(column):
+    """ "Mon, Wed" / "M W F" / "Tues/Thurs" -> (day_mask, has_unknown_token) per row """
+    tokens = column.str.replace(r"[,;/]", " ", regex=True).str.split().explode()
+    days = tokens.str.lower().map(DAY_ALIASES)
+    unknown = (tokens.notna() & days.isna()).groupby(level=0).any()
+    bits = (pd.DataFrame({"row": days.index, "bit": days.map(DAY_BITS)})
+            .dropna().drop_duplicates()
+            .groupby("row")["bit"].sum())
+    mask = bits.reindex(column.index, fill_value=0).astype(int)
+    return mask, unknown.reindex(column.index, fill_value=False)
+
+
+def normalize(df):
+    """ adds start/end minutes and day_mask; start/end become "HH:MM" where they parse """
+    out = df.copy()
+    raw_start, raw_end = out["start"], out["end"]
+    out["start_minutes"], out["start"] = _parse_times(raw_start)
+    out["end_minutes"], out["end"] = _parse_times(raw_end)
+    out["day_mask"], out["bad_days"] = _parse_days(out["days"])
+    out["bad_start"] = (raw_start != "") & out["start_minutes"].isna()
+    out["bad_end"] = (raw_end != "") & out["end_minutes"].isna()
+    return out
+
+
+def stored_courses(df):
+    """
+    The stored courses in the (year, term) pairs that appear in the file: their id,
+    KEY names and payload columns (start/end minutes, day_mask), one row per course.
+    """
+    qs = (Course.objects
+          .filter(academic_year__name__in=set(df["year"]), term__name__in=set(df["term"]))
+          .values_list("id", "code__name", "number__name", "section__name", "academic_year__name", "term__name",
+                       "start_time__minutes_since_midnight", "end_time__minutes_since_midnight", "day_mask"))
+    stored = pd.DataFrame(list(qs), columns=["course_id", *KEY, "start_minutes", "end_minutes", "day_mask"])
+    # the year/term filter above is a cross product; keep only the pairs the file covers
+    return stored.merge(df[["year", "term"]].drop_duplicates(), on=["year", "term"])
+
+
+def payload_hash(df):
+    """ one uint64 per row over what an import can change on an existing course (times and days) """
+    payload = df[["start_minutes", "end_minutes", "day_mask"]].fillna(-1).astype("int64")
+    return pd.util.hash_pandas_object(payload, index=False).to_numpy()
+
+
+def validation_errors(df):
+    """ {row number: [message, ...]} for every row that cannot be imported as it is """
+    checks = {f"{label} is required.": df[column] == "" for column, _, label in LOOKUPS}
+    checks.update({
+        "Start time is not HH:MM.": df["bad_start"],
+        "End time is not HH:MM.": df["bad_end"],
+        "End time must be later than start time.": df["end_minutes"] <= df["start_minutes"],
+        "Unknown day name.": df["bad_days"],
+        "Duplicate of another row in the file.": df.duplicated(subset=KEY, keep=False) & (df[KEY] != "").all(axis=1),
+    })
+    for column, _, label in LOOKUPS:
+        max_length = COURSE_LOOKUP_MAX_LENGTH[column]
+        checks[f"{label} is longer than {max_length} characters."] = df[column].str.len() > max_length
+
+    failed = pd.DataFrame(checks)
+    errors = {}
+    for row, flags in failed[failed.any(axis=1)].iterrows():
+        errors[row] = [message for message, flag in flags.items() if flag]
+    return errors
+
+
+def _new_lookup_names(df):
+    new = {}
+    for column, model, label in LOOKUPS:
+        names = set(df[column]) - {""}
+        known = set(model.objects.filter(name__in=names).values_list("name", flat=True))
+        if names - known:
+            new[label] = sorted(names - known)
+    times = (set(df["start_minutes"].dropna()) | set(df["end_minutes"].dropna()))
+    known = set(CourseTime.objects.filter(minutes_since_midnight__in=times)
+                .values_list("minutes_since_midnight", flat=True))
+    if times - known:
+        new["Time"] = sorted(f"{int(m) // 60:02d}:{int(m) % 60:02d}" for m in times - known)
+    return new
+
+
+def plan_import(df, sync=False, delete_missing=False):
+    """
+    Validate a read_schedule() frame against the database without writing anything.
+
+    By default every row must be a new course. With `sync`, rows matching a stored
+    course on KEY are compared by payload_hash and become "update" or "unchanged";
+    with `delete_missing` as well, stored courses in the file's (year, term) pairs
+    that the file no longer lists are planned for deletion.
+
+    Returns {"rows", "errors", "new_lookups", "create", "update", "unchanged",
+    "delete", "delete_ids", "total", "sync"}; `rows` holds the normalized frame with
+    a "status" column (create / update / unchanged / error) for the preview.
+    """
+    rows = normalize(df)
+    errors = validation_errors(rows)
+    stored = stored_courses(rows)
+
+    # courses with an empty key part can't be listed in a file; they only count for delete_missing
+    keyed = stored.dropna(subset=KEY).drop_duplicates(subset=KEY)
+    matched = rows.reset_index().merge(keyed, on=KEY, how="left", suffixes=("", "_stored"))
+    matched = matched.set_index("index")
+    found = matched["course_id"].notna()
+    if not sync:
+        for row in matched.index[found]:
+            errors.setdefault(row, []).append("Course already exists.")
+
+    rows["course_id"] = matched["course_id"]
+    rows["stored_day_mask"] = matched["day_mask_stored"]
+    rows["status"] = "create"
+    stored_payload = matched[["start_minutes_stored", "end_minutes_stored", "day_mask_stored"]]
+    stored_payload.columns = ["start_minutes", "end_minutes", "day_mask"]
+    same = payload_hash(rows) == payload_hash(stored_payload)
+    rows.loc[found & same, "status"] = "unchanged"
+    rows.loc[found & ~same, "status"] = "update"
+    rows.loc[list(errors), "status"] = "error"
+
+    delete_ids = []
+    if sync and delete_missing:
+        listed = set(rows["course_id"].dropna().astype(int))
+        delete_ids = sorted(set(stored["course_id"]) - listed)
+
+    counts = rows["status"].value_counts()
+    return {
+        "rows": rows,
+        "errors": dict(sorted(errors.items())),
+        "new_lookups": _new_lookup_names(rows[rows["status"].isin(["create", "update"])]),
+        "create": int(counts.get("create", 0)),
+        "update": int(counts.get("update", 0)),
+        "unchanged": int(counts.get("unchanged", 0)),
+        "delete": len(delete_ids),
+        "delete_ids": delete_ids,
+        "total": len(rows),
+        "sync": sync,
+    }
+
+
+def preview_rows(plan, limit=50):
+    """ the first `limit` rows as dicts for the preview table """
+    rows = plan["rows"].head(limit)
+    return [{
+        "row": index,
+        "status": r["status"],
+        "code": r["code"], "number": r["number"], "section": r["section"],
+        "term": r["term"], "year": r["year"],
+        "days": ",".join(day_names_for(int(r["day_mask"]))),
+        "start": r["start"], "end": r["end"],
+        "errors": plan["errors"].get(index, []),
+    } for index, r in rows.iterrows()]
+
+
+def _resolve_all(rows):
+    lookups = {}
+    taken = set(CourseCode.objects.values_list("color", flat=True))
+    for column, model, _ in LOOKUPS:
+        build = None
+        if model is CourseCode:
+            build = lambda name: CourseCode(name=name, color=code_color(name, taken))
+        lookups[column] = resolve_lookups(model, sorted(set(rows[column]) - {""}), build)
+    lookups["time"] = resolve_times((set(rows["start"]) | set(rows["end"])) - {""})
+    return lookups
+
+
+def _course_for(r, lookups):
+    times = lookups["time"]
+    return Course(
+        code=lookups["code"][r["code"]], number=lookups["number"][r["number"]],
+        section=lookups["section"][r["section"]], term=lookups["term"][r["term"]],
+        academic_year=lookups["year"][r["year"]],
+        start_time=times.get(r["start"]), end_time=times.get(r["end"]),
+    )
+
+
+def apply_import(plan, batch_size=2000):
+    """
+    Write the plan in one transaction: insert "create" rows, update the times and
+    days of "update" rows, delete plan["delete_ids"]. "unchanged" rows are never
+    touched. Refuses a plan that has errors.
+    """
+    if plan["errors"]:
+        raise ScheduleImportError("Fix the rows with errors before importing.")
+    rows = plan["rows"]
+    created, updated = rows[rows["status"] == "create"], rows[rows["status"] == "update"]
+    ids = plan.get("delete_ids", [])
+    if not (len(created) or len(updated) or ids):
+        return {"created": 0, "updated": 0, "deleted": 0}
+    with transaction.atomic():
+        lookups = _resolve_all(pd.concat([created, updated]))
+        courses = [_course_for(r, lookups) for _, r in created.iterrows()]
+        if courses:
+            insert_courses(courses, [day_names_for(int(m)) for m in created["day_mask"]], batch_size=batch_size)
+        if len(updated):
+            _update_courses(updated, lookups, batch_size)
+        for i in range(0, len(ids), batch_size):
+            Course.objects.filter(pk__in=ids[i:i + batch_size]).delete()
+        if len(updated) or ids:
+            bump_schedule_version()
+    return {"created": len(courses), "updated": len(updated), "deleted": len(ids)}
+
+
+def _update_courses(rows, lookups, batch_size):
+    """ bulk update times and day_mask; day rows are only rewritten where the days changed """
+    times = lookups["time"]
+    courses = [
+        Course(pk=int(r["course_id"]), start_time=times.get(r["start"]), end_time=times.get(r["end"]),
+               day_mask=int(r["day_mask"]))
+        for _, r in rows.iterrows()
+    ]
+    Course.objects.bulk_update(courses, ["start_time", "end_time", "day_mask"], batch_size=batch_size)
+    queue_course_refresh(course_ids=[c.pk for c in courses])
+
+    moved = rows[rows["day_mask"] != rows["stored_day_mask"]]
+    if len(moved):
+        days = resolve_lookups(CourseDay, DAYS)
+        Through = Course.day.through
+        ids = [int(pk) for pk in moved["course_id"]]
+        for i in range(0, len(ids), batch_size):
+            Through.objects.filter(course_id__in=ids[i:i + batch_size]).delete()
+        Through.objects.bulk_create(
+            [Through(course_id=int(pk), courseday_id=days[d].pk)
+             for pk, mask in zip(moved["course_id"], moved["day_mask"]) for d in day_names_for(int(mask))],
+            batch_size=batch_size,
+        )
@@ -0,0 +1,109 @@
+'''
+Conflict/layout engine for the timetable grid.
+
+Every course is reduced to an integer minute interval [start, end) on each of
+its days, so overlap detection never has to walk the day minute by minute.
+Per day the intervals are sorted once and swept from earliest to latest start;
+the cost therefore depends on the number of courses, not on their duration.
+
+The output mirrors what the landing page template expects in `course.day_data`:
+    {"Mon": {"overlap": bool, "width": float, "left": None, "z": int}, ...}
+Days a course does not meet on keep all values as None.
+'''
+import heapq
+
+DAYS = ["Mon", "Tues", "Wed", "Thurs", "Fri"]
+MINUTES_PER_DAY = 24 * 60
+
+# each overlapping predecessor shrinks a card to 90% of the width
+WIDTH_FACTOR = 0.9
+BASE_ZINDEX = 100
+
+
+# helper: turn "HH:MM" into minutes since midnight
+def to_minutes(hhmm):
+    hh, mm = map(int, hhmm[:5].split(":"))
+    return hh * 60 + mm
+
+
+def overlap_depths(intervals):
+    """
+    intervals: iterable of (key, start, end) on a single day.
+    Returns {key: k} where k is the number of earlier intervals (ordered by
+    start minute, then key) that still cover this interval's start.
+
+    O(n log n): the open intervals live in a min-heap of end minutes. Starts
+    only move forward, so an interval popped once it has ended never needs
+    to be counted again, and k is simply the heap size.
+    """
+    ordered = sorted(intervals, key=lambda it: (it[1], it[0]))
+    depths = {}
+    active = []  # min-heap of end minutes of earlier intervals still open
+    for key, start, end in ordered:
+        while active and active[0] <= start:
+            heapq.heappop(active)
+        depths[key] = len(active)
+        heapq.heappush(active, end)
+    return depths
+
+
+def _day_entry(k):
+    return {
+        "overlap": k > 0,
+        "width": round(100.0 * (WIDTH_FACTOR ** k), 2),
+        "left": None,
+        "z": BASE_ZINDEX + k,
+    }
+
+
+def entry_depth(entry):
+    """ the overlap depth k a day_data entry was built from """
+    return entry["z"] - BASE_ZINDEX
+
+
+def _empty_day_entry():
+    return {"overlap": None, "width": None, "left": None, "z": None}
+
+
+def layout_courses(items):
+    """
+    items: iterable of (key, day_names, start_minutes, end_minutes).
+    Returns {key: {"duration": int, "offset_top": int, "day_data": {...}}}
+    with one entry per item; `duration` and `offset_top` are in minutes.
+    """
+    items = list(items)
+    by_day = {d: [] for d in DAYS}
+    for key, day_names, start, end in items:
+        for d in day_names:
+            by_day[d].append((key, start, end))
+
+    result = {}
+    for key, day_names, start, end in items:
+        result[key] = {
+            "duration": (end - start) % MINUTES_PER_DAY,
+            "offset_top": start % 60,
+            "day_data": {d: _empty_day_entry() for d in DAYS},
+        }
+
+    for d, intervals in by_day.items():
+        for key, k in overlap_depths(intervals).items():
+            result[key]["day_data"][d] = _day_entry(k)
+
+    return result
+
+
+def build_grid(hours, cards):
+    """
+    hours: ["08", "09", ...] row labels; cards: iterable of (hour, day, card).
+    Returns [{"hour": "08", "cells": [[card, ...] for each of DAYS]}, ...] so the
+    template only walks real placements. Cards keep their input order within a
+    cell; cards whose hour/day has no row/column are dropped.
+    """
+    rows = [{"hour": h, "cells": [[] for _ in DAYS]} for h in hours]
+    row_for = {h: row for h, row in zip(hours, rows)}
+    col_for = {d: i for i, d in enumerate(DAYS)}
+    for hour, day, card in cards:
+        row = row_for.get(hour)
+        if row is not None and day in col_for:
+            row["cells"][col_for[day]].append(card)
+    return rows
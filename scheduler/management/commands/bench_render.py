@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.contrib.auth.models import AnonymousUser
+
+from scheduler.layout import DAYS
+from scheduler.models import (
+    Course, CourseCode, CourseNumber, CourseSection, CourseTerm, CourseTime, CourseYear, DAY_BITS,
+)
+from scheduler.views import timetable_grid
+
+
+def build_courses(n, seed=0):
+    """
+    n unsaved Course objects with their related rows attached in memory, so
+    the layout and the template can be timed without touching the database.
+    """
+    rng = random.Random(seed)
+    codes = [CourseCode(id=i, name=f"C{i:03d}", color=f"#{rng.randrange(0x1000000):06x}") for i in range(40)]
+    numbers = [CourseNumber(id=i, name=str(100 + i)) for i in range(400)]
+    sections = [CourseSection(id=i, name=f"{i + 1:03d}") for i in range(10)]
+    term = CourseTerm(id=1, name="T1")
+    year = CourseYear(id=1, name="2025")
+    times = {m: CourseTime(id=m, name=f"{m // 60:02d}:{m % 60:02d}", minutes_since_midnight=m)
+             for m in range(8 * 60, 22 * 60, 10)}
+
+    courses = []
+    for i in range(n):
+        start = rng.randrange(8 * 60, 20 * 60, 30)
+        end = min(start + rng.choice([50, 80, 110, 170]), 21 * 60 + 50)
+        days = rng.sample(DAYS, rng.randint(1, 3))
+        courses.append(Course(
+            id=i + 1,
+            code=rng.choice(codes), number=rng.choice(numbers), section=rng.choice(sections),
+            term=term, academic_year=year,
+            start_time=times[start], end_time=times[end - end % 10],
+            day_mask=sum(DAY_BITS[d] for d in days),
+        ))
+    return courses
+
+
+class Command(BaseCommand):
+    help = "Time the landing page grid build and template render for synthetic course counts (no database needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[50, 500, 5000])
+        parser.add_argument("--repeat", type=int, default=3, help="runs per size; the best run is reported")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/home/", {"year": "2025", "term": "T1", "search": "1"})
+        request.user = AnonymousUser()
+
+        self.stdout.write(f"{'courses':>8} {'grid ms':>10} {'render ms':>10} {'html KB':>9}")
+        for n in options["sizes"]:
+            best_grid = best_render = float("inf")
+            size = 0
+            for _ in range(options["repeat"]):
+                courses = build_courses(n, options["seed"])
+
+                t0 = time.perf_counter()
+                grid = timetable_grid(courses)
+                t1 = time.perf_counter()
+                html = render_to_string("timetable/landing_page.html", {
+                    "grid": grid,
+                    "courses": courses,
+                    "submitted": True,
+                    "selected_year": "2025",
+                    "selected_terms": ["T1"],
+                }, request=request)
+                t2 = time.perf_counter()
+
+                best_grid = min(best_grid, t1 - t0)
+                best_render = min(best_render, t2 - t1)
+                size = len(html)
+
+            self.stdout.write(f"{n:>8} {best_grid * 1000:>10.1f} {best_render * 1000:>10.1f} {size / 1024:>9.1f}")
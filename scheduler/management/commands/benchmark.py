@@ -0,0 +1,286 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from io import StringIO
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.http import QueryDict
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from scheduler.caching import layout_cache
+from scheduler.pagination import keyset_page
+from scheduler.models import (
+    Course, CourseCode, CourseNumber, CourseSection, CourseTerm, CourseTime, CourseYear,
+    Profile, ProgramName, Role,
+)
+from scheduler.views import search_courses, split_valid_courses, timetable_filters, timetable_grid, timetable_queryset
+
+YEAR = "2025"
+TERM = "T1"
+PROGRAM = "Synthetic Program 001"
+LEVEL = "1"
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summary(samples, queries):
+    ms = [s * 1000 for s in samples]
+    return {
+        "min_ms": round(min(ms), 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "max_ms": round(max(ms), 3),
+        "runs": len(ms),
+        "queries": queries,
+    }
+
+
+class Command(BaseCommand):
+    help = ("Time the scheduler hot paths (landing page phases, view_courses pages, requirements, "
+            "the *_affected endpoints and the reslug handlers) against a throwaway SQLite database "
+            "seeded with seed_schedule, and write the results as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 5000, 20000],
+                            help="course counts to seed, in increasing order")
+        parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="-", help="JSON file to write, or - for stdout")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("The benchmark runs against a local SQLite database only.")
+        sizes = sorted(set(options["sizes"]))
+        if not sizes or sizes[0] <= 0:
+            raise CommandError("--sizes must be positive course counts.")
+        self.repeat = max(1, options["repeat"])
+
+        # a fresh test database, so the configured one is never touched
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            call_command("createcachetable", verbosity=0)
+            self.client = self._logged_in_client()
+            results = {}
+            for size in sizes:
+                seeded = Course.objects.count()
+                call_command("seed_schedule", courses=size - seeded, seed=options["seed"], stdout=StringIO())
+                self.stderr.write(f"benchmarking {size} courses ...")
+                results[str(size)] = self.run_cases()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "git_revision": _git_revision(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": self.repeat,
+                "seed": options["seed"],
+            },
+            "results": results,
+        }
+        payload = json.dumps(report, indent=2)
+        if options["output"] == "-":
+            self.stdout.write(payload)
+        else:
+            with open(options["output"], "w") as fh:
+                fh.write(payload + "\n")
+            self.stderr.write(f"wrote {options['output']}")
+
+    def _logged_in_client(self):
+        user = User.objects.create_user("benchmark")
+        Profile.objects.create(user=user, role=Role.objects.get_or_create(name="Admin")[0])
+        client = Client()
+        client.force_login(user)
+        self.request = RequestFactory().get("/home/")
+        self.request.user = user
+        return client
+
+    def measure(self, fn, setup=None):
+        """ time fn() `repeat` times; setup() runs untimed before each call """
+        samples, queries = [], 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            queries = 0
+            # counted with an execute wrapper; the debug query log is capped at 9000 entries
+            with connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - start)
+        return _summary(samples, queries)
+
+    def get(self, url, params=None):
+        def fetch():
+            response = self.client.get(url, params)
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}")
+        return fetch
+
+    def run_cases(self):
+        cases = {}
+        cases.update(self.landing_cases("term", {"year": YEAR, "term": TERM, "search": "1"}))
+        cases.update(self.landing_cases("program", {"year": YEAR, "term": TERM, "search": "1",
+                                                    "pname": PROGRAM, "plevel": LEVEL}))
+        cases.update(self.view_courses_cases())
+        cases.update(self.requirements_cases())
+        cases.update(self.affected_cases())
+        cases.update(self.reslug_cases())
+        return cases
+
+    def landing_cases(self, label, params):
+        filters = timetable_filters(QueryDict(urlencode(params)))
+        state = {}
+
+        def fetch_rows():
+            state["rows"] = list(timetable_queryset(filters))
+
+        def split():
+            state["valid"], state["invalid"] = split_valid_courses(state["rows"])
+
+        def layout():
+            state["grid"] = timetable_grid(state["valid"])
+
+        def render():
+            render_to_string("timetable/landing_page.html", {
+                "grid": state["grid"],
+                "courses": state["valid"],
+                "invalid_courses": state["invalid"],
+                "submitted": True,
+                "selected_year": YEAR,
+                "selected_terms": [TERM],
+            }, request=self.request)
+
+        prefix = f"landing.{label}"
+        url = reverse("scheduler:landing_page")
+        cases = {
+            f"{prefix}.query": self.measure(fetch_rows),
+            f"{prefix}.split": self.measure(split),
+            f"{prefix}.layout": self.measure(layout),
+            f"{prefix}.render": self.measure(render),
+            f"{prefix}.request_cold": self.measure(self.get(url, params), setup=layout_cache.clear),
+            f"{prefix}.request_cached": self.measure(self.get(url, params)),
+        }
+        for case in cases.values():
+            case["rows"] = len(state["rows"])
+        return cases
+
+    def view_courses_cases(self):
+        url = reverse("scheduler:view_courses")
+        params = {"year": YEAR, "search": "1"}
+        # pages are reached through cursors, so follow next_cursor to find the middle and last page's
+        courses, _ = search_courses(QueryDict(urlencode(params)))
+        cursors, page = [None], keyset_page(courses)
+        while page["has_next"]:
+            cursors.append(page["next_cursor"])
+            page = keyset_page(courses, page["next_cursor"])
+        return {
+            "view_courses.first_page": self.measure(self.get(url, params)),
+            "view_courses.middle_page": self.measure(self.get(url, {**params, "cursor": cursors[len(cursors) // 2]})),
+            "view_courses.last_page": self.measure(self.get(url, {**params, "cursor": cursors[-1]})),
+            "view_courses.day_filter": self.measure(self.get(url, {**params, "day": ["Mon", "Fri"]})),
+        }
+
+    def requirements_cases(self):
+        url = reverse("scheduler:requirements")
+        return {
+            "requirements.search": self.measure(self.get(url, {"program": PROGRAM, "level": LEVEL, "search": "1"})),
+            "requirements.levels": self.measure(self.get(reverse("scheduler:ajax_levels_for_program"),
+                                                         {"program": PROGRAM})),
+            "requirements.numbers": self.measure(self.get(reverse("scheduler:ajax_numbers_for_code"),
+                                                          {"code": CourseCode.objects.order_by("name")[0].name})),
+        }
+
+    def affected_cases(self):
+        def busiest(model, related):
+            # the row referenced by the most courses, so the endpoint returns its largest payload
+            return model.objects.annotate(n=Count(related)).order_by("-n", "pk").values_list("pk", flat=True)[0]
+
+        targets = {
+            "course_term_affected": busiest(CourseTerm, "course"),
+            "course_code_affected": busiest(CourseCode, "course"),
+            "course_number_affected": busiest(CourseNumber, "course"),
+            "course_section_affected": busiest(CourseSection, "course"),
+            "course_time_affected": busiest(CourseTime, "start_time"),
+            "course_year_affected": busiest(CourseYear, "course"),
+            "program_name_affected": busiest(ProgramName, "program"),
+        }
+        return {
+            f"affected.{name}": self.measure(self.get(reverse(f"scheduler:{name}", args=[pk])))
+            for name, pk in targets.items()
+        }
+
+    def reslug_cases(self):
+        cases = {}
+        # renames fire the post_save reslug handlers; each run renames and restores the row
+        for label, model in (("code", CourseCode), ("section", CourseSection), ("term", CourseTerm)):
+            row = model.objects.annotate(n=Count("course")).order_by("-n", "pk")[0]
+            original = row.name
+
+            def rename(row=row, original=original):
+                row.name = f"{original}X" if row.name == original else original
+                row.save()
+
+            cases[f"reslug.rename_{label}"] = {**self.measure(rename), "rows": row.n}
+            if row.name != original:
+                row.name = original
+                row.save()
+
+        # deleting a lookup fires the pre_delete orphan cleanup and queues the bulk reslug
+        template = list(Course.objects.filter(code=CourseCode.objects.order_by("name")[0]))
+        doomed = {}
+
+        def make_code():
+            code = CourseCode.objects.create(name="ZZBENCH", color="#FEFEFE")
+            copies = Course.objects.bulk_create([
+                Course(code=code, number_id=c.number_id, section_id=c.section_id,
+                       academic_year_id=c.academic_year_id, term_id=c.term_id,
+                       start_time_id=c.start_time_id, end_time_id=c.end_time_id,
+                       day_mask=c.day_mask, slug=f"zzbench-{c.pk}")
+                for c in template
+            ])
+            doomed["code"], doomed["ids"] = code, [c.pk for c in copies]
+
+        def delete_code():
+            doomed["code"].delete()
+
+        def cleanup():
+            Course.objects.filter(pk__in=doomed.pop("ids", [])).delete()
+
+        def setup():
+            cleanup()
+            make_code()
+
+        cases["reslug.delete_code"] = {**self.measure(delete_code, setup=setup), "rows": len(template)}
+        cleanup()
+        return cases
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from scheduler.caching import bump_schedule_version
+from scheduler.models import Course, refreshable_courses, stale_search_row, write_search_rows
+
+
+class Command(BaseCommand):
+    help = ("Compare every CourseSearch row with the Course it projects and report missing or stale rows; "
+            "--repair rewrites them. Exits with an error while any remain.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repair", action="store_true", help="rewrite the missing and stale rows")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--show", type=int, default=10, help="how many mismatched courses to list")
+
+    def handle(self, *args, **options):
+        missing, stale = [], []
+        for course in refreshable_courses(Course.objects.order_by("pk")).iterator(chunk_size=options["batch_size"]):
+            row = stale_search_row(course)
+            if row is not None:
+                (stale if hasattr(course, "search") else missing).append(row)
+
+        for row in (missing + stale)[:options["show"]]:
+            self.stdout.write(f"course {row.course_id}: expected {row}")
+        self.stdout.write(f"{len(missing)} missing and {len(stale)} stale search rows.")
+        if not missing and not stale:
+            return
+
+        if not options["repair"]:
+            raise CommandError("The search projection is out of date; run with --repair or rebuild_course_search.")
+        with transaction.atomic():
+            write_search_rows(missing + stale, batch_size=options["batch_size"])
+            bump_schedule_version()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(missing) + len(stale)} search rows."))
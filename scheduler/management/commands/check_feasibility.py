@@ -0,0 +1,119 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from scheduler.conflicts import check_feasibility, course_bitmap
+from scheduler.models import Course, CourseTerm, CourseYear, FeasibilityReport, FeasibilityStatus, Program
+
+
+def _label(obj):
+    return getattr(obj, "name", "") or "None"
+
+
+class Command(BaseCommand):
+    help = ("Check every (program name, year level, term) of an academic year for at least one clash-free "
+            "section combination and store the results in FeasibilityReport (see the admin site).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", required=True, help="academic year name, e.g. 2025")
+        parser.add_argument("--terms", nargs="+", help="term names to check (default: every term with courses)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="worker processes; 0 runs every check in this process")
+        parser.add_argument("--time-limit", type=float, default=10.0,
+                            help="search seconds per program and term before it is reported as timed out")
+
+    def handle(self, *args, **options):
+        year = CourseYear.objects.filter(name=options["year"]).first()
+        if year is None:
+            raise CommandError(f"Academic year {options['year']!r} does not exist.")
+        terms = CourseTerm.objects.filter(course__academic_year=year).distinct()
+        if options["terms"]:
+            terms = terms.filter(name__in=options["terms"])
+        terms = {t.pk: t for t in terms}
+
+        tasks, programs = self.build_tasks(year, terms)
+        if not tasks:
+            self.stdout.write("No program has courses in the selected year and terms.")
+            return
+
+        started = time.perf_counter()
+        results = self.run_tasks(tasks, options["workers"], options["time_limit"])
+
+        reports = []
+        for (program_id, term_id), result in results.items():
+            reports.append(FeasibilityReport(
+                program=programs[program_id],
+                academic_year=year,
+                term=terms[term_id],
+                status=result.get("status", FeasibilityStatus.ERROR),
+                course_count=result.get("courses", 0),
+                unschedulable=result.get("unschedulable", []),
+                conflicting_pairs=result.get("conflicting_pairs", []),
+                example=result.get("example", []),
+                detail=result.get("detail", ""),
+                elapsed_ms=result.get("elapsed_ms", 0),
+            ))
+        with transaction.atomic():
+            FeasibilityReport.objects.filter(academic_year=year, term__in=terms.values()).delete()
+            FeasibilityReport.objects.bulk_create(reports)
+
+        counts = {}
+        for report in reports:
+            counts[report.status] = counts.get(report.status, 0) + 1
+        summary = ", ".join(f"{n} {FeasibilityStatus(status).label.lower()}" for status, n in sorted(counts.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {len(reports)} program terms in {time.perf_counter() - started:.1f}s: {summary}."
+        ))
+
+    def build_tasks(self, year, terms):
+        """
+        Load everything in this process: {(program_id, term_id): {"CODE NUMBER": [(section, bitmap)]}}.
+        Workers only receive plain data, never touch the database.
+        """
+        courses = {
+            c.pk: c for c in
+            Course.objects
+            .filter(academic_year=year, term__in=terms.values(), programs__isnull=False)
+            .select_related("code", "number", "section", "start_time", "end_time")
+            .distinct()
+        }
+        memberships = (Program.courses.through.objects
+                       .filter(course_id__in=courses.keys())
+                       .values_list("program_id", "course_id"))
+
+        tasks = {}
+        for program_id, course_id in memberships:
+            c = courses[course_id]
+            groups = tasks.setdefault((program_id, c.term_id), {})
+            groups.setdefault(f"{_label(c.code)} {_label(c.number)}", []).append(
+                (_label(c.section), course_bitmap(c))
+            )
+        for groups in tasks.values():
+            for options in groups.values():
+                options.sort(key=lambda option: option[0])
+
+        programs = Program.objects.select_related("name", "year_level").in_bulk({key[0] for key in tasks})
+        return tasks, programs
+
+    def run_tasks(self, tasks, workers, time_limit):
+        if workers <= 0:
+            return {key: self._run_inline(groups, time_limit) for key, groups in tasks.items()}
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(check_feasibility, groups, time_limit): key for key, groups in tasks.items()}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as exc:
+                    results[futures[future]] = {"status": FeasibilityStatus.ERROR, "detail": repr(exc)}
+        return results
+
+    def _run_inline(self, groups, time_limit):
+        try:
+            return check_feasibility(groups, time_limit)
+        except Exception as exc:
+            return {"status": FeasibilityStatus.ERROR, "detail": repr(exc)}
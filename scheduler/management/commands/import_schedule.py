@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scheduler.importer import ScheduleImportError, apply_import, plan_import, read_schedule
+
+
+class Command(BaseCommand):
+    help = ("Import courses from a .csv or .xlsx schedule with columns "
+            "code, number, section, term, year, days, start, end.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--dry-run", action="store_true", help="validate and report without writing")
+        parser.add_argument("--sync", action="store_true",
+                            help="update courses that already exist instead of rejecting them")
+        parser.add_argument("--delete-missing", action="store_true",
+                            help="with --sync, delete courses of the file's years/terms that it does not list")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options["delete_missing"] and not options["sync"]:
+            raise CommandError("--delete-missing requires --sync.")
+        started = time.perf_counter()
+        try:
+            with open(options["path"], "rb") as fh:
+                plan = plan_import(read_schedule(fh, options["path"]),
+                                   sync=options["sync"], delete_missing=options["delete_missing"])
+        except (OSError, ScheduleImportError) as exc:
+            raise CommandError(str(exc))
+
+        for label, names in plan["new_lookups"].items():
+            self.stdout.write(f"new {label}: {', '.join(names)}")
+        for row, messages in plan["errors"].items():
+            self.stdout.write(self.style.ERROR(f"row {row}: {' '.join(messages)}"))
+        self.stdout.write(
+            f"{plan['total']} rows: {plan['create']} to create, {plan['update']} to update, "
+            f"{plan['unchanged']} unchanged, {plan['delete']} to delete, {len(plan['errors'])} with errors."
+        )
+
+        if plan["errors"]:
+            raise CommandError("Nothing was imported; fix the rows with errors first.")
+        if options["dry_run"]:
+            return
+        result = apply_import(plan, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']}, updated {result['updated']} and deleted {result['deleted']} courses in {time.perf_counter() - started:.1f}s."
+        ))
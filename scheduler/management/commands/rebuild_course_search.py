@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scheduler.caching import bump_schedule_version
+from scheduler.models import Course, CourseSearch, refreshable_courses, search_row_for
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the CourseSearch projection from Course in one transaction. "
+            "Run it after writes that bypassed the model signals (raw SQL, queryset.update()).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+        written = 0
+        with transaction.atomic():
+            CourseSearch.objects.all().delete()
+            rows = []
+            for course in refreshable_courses(Course.objects.order_by("pk")).iterator(chunk_size=batch_size):
+                rows.append(search_row_for(course))
+                if len(rows) >= batch_size:
+                    written += len(CourseSearch.objects.bulk_create(rows))
+                    rows = []
+            written += len(CourseSearch.objects.bulk_create(rows))
+            bump_schedule_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} search rows in {time.perf_counter() - started:.1f}s."
+        ))
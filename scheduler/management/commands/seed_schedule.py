@@ -0,0 +1,123 @@
+import itertools
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from scheduler.caching import bump_schedule_version
+from scheduler.importer import insert_courses, resolve_lookups, resolve_times
+from scheduler.models import (
+    Course, CourseCode, CourseNumber, CourseSection, CourseTerm, CourseYear,
+    HistoryAction, HistoryLog, HistoryTopic, Program, ProgramName, ProgramYearLevel,
+)
+
+NUMBERS_PER_CODE = 30
+SECTIONS_PER_NUMBER = 3
+COURSES_PER_PROGRAM = 8  # (code, number) pairs attached to each program
+
+# common day patterns and lengths (minutes) for a lecture
+DAY_PATTERNS = [["Mon", "Wed", "Fri"], ["Tues", "Thurs"], ["Mon", "Wed"], ["Mon"], ["Tues"], ["Wed"], ["Thurs"], ["Fri"]]
+DURATIONS = [50, 80, 110, 170]
+
+
+class Command(BaseCommand):
+    help = ("Seed synthetic courses, day assignments, programs and history with bulk inserts. "
+            "Deterministic for a given --seed; intended for local load testing only.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=1000)
+        parser.add_argument("--years", nargs="+", default=["2025"])
+        parser.add_argument("--terms", nargs="+", default=["T1", "T2"])
+        parser.add_argument("--programs", type=int, default=20)
+        parser.add_argument("--year-levels", type=int, default=4)
+        parser.add_argument("--history", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options["courses"] < 0:
+            raise CommandError("--courses must not be negative.")
+        started = time.perf_counter()
+        with transaction.atomic():
+            created = self.seed(options)
+            # bulk inserts skip the model signals, so invalidate cached layouts here
+            bump_schedule_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {created} courses in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def seed(self, options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+        n = options["courses"]
+        years, terms = options["years"], options["terms"]
+
+        # --- lookups ---
+        per_code = len(years) * len(terms) * NUMBERS_PER_CODE * SECTIONS_PER_NUMBER
+        code_count = max(1, -(-n // per_code))
+        used_colors = set(CourseCode.objects.values_list("color", flat=True))
+        free_colors = (c for c in (f"#{i:06X}" for i in range(0x1000000)) if c not in used_colors)
+        codes = resolve_lookups(CourseCode, [f"S{i:04d}" for i in range(code_count)],
+                                build=lambda name: CourseCode(name=name, color=next(free_colors)))
+        numbers = resolve_lookups(CourseNumber, [str(100 + i) for i in range(NUMBERS_PER_CODE)])
+        sections = resolve_lookups(CourseSection, [f"{i + 1:03d}" for i in range(SECTIONS_PER_NUMBER)])
+        year_rows = resolve_lookups(CourseYear, years)
+        term_rows = resolve_lookups(CourseTerm, terms)
+
+        # times every 10 minutes, reusing stored rows with the same minutes
+        times = resolve_times([f"{m // 60:02d}:{m % 60:02d}" for m in range(8 * 60, 22 * 60, 10)])
+
+        # --- courses ---
+        existing = set(Course.objects
+                       .filter(academic_year__in=year_rows.values(), term__in=term_rows.values())
+                       .values_list("code_id", "number_id", "section_id", "academic_year_id", "term_id"))
+        courses, course_days, groups = [], [], {}
+        keys = itertools.product(sorted(codes), sorted(numbers, key=int), years, terms, sorted(sections))
+        for code, number, year, term, section in keys:
+            if len(courses) >= n:
+                break
+            c = Course(code=codes[code], number=numbers[number], section=sections[section],
+                       academic_year=year_rows[year], term=term_rows[term])
+            if (c.code_id, c.number_id, c.section_id, c.academic_year_id, c.term_id) in existing:
+                continue
+            days = rng.choice(DAY_PATTERNS)
+            start = rng.randrange(8 * 60, 19 * 60, 30)
+            end = start + rng.choice(DURATIONS)
+            c.start_time = times[f"{start // 60:02d}:{start % 60:02d}"]
+            c.end_time = times[f"{end // 60:02d}:{end % 60:02d}"]
+            courses.append(c)
+            course_days.append(days)
+            groups.setdefault((code, number), []).append(c)
+
+        # pks are reserved up front so each slug is final on insert; Course.save writes every row twice
+        insert_courses(courses, course_days, batch_size=batch_size)
+
+        # --- programs ---
+        levels = resolve_lookups(ProgramYearLevel, [str(i + 1) for i in range(options["year_levels"])])
+        names = resolve_lookups(ProgramName, [f"Synthetic Program {i + 1:03d}" for i in range(options["programs"])])
+        existing_programs = {(p.name_id, p.year_level_id): p for p in Program.objects.filter(name__in=names.values())}
+        new_programs = [Program(name=name, year_level=level)
+                        for name in names.values() for level in levels.values()
+                        if (name.pk, level.pk) not in existing_programs]
+        Program.objects.bulk_create(new_programs, batch_size=batch_size)
+        if new_programs and new_programs[0].pk is None:
+            raise CommandError("This database backend does not return primary keys from bulk inserts.")
+
+        group_keys = sorted(groups)
+        ProgramCourses = Program.courses.through
+        memberships = []
+        for program in new_programs:
+            for key in rng.sample(group_keys, min(COURSES_PER_PROGRAM, len(group_keys))):
+                memberships.extend(ProgramCourses(program_id=program.pk, course_id=c.pk) for c in groups[key])
+        ProgramCourses.objects.bulk_create(memberships, batch_size=batch_size)
+
+        # --- history ---
+        topics, actions = list(HistoryTopic.values), list(HistoryAction.values)
+        HistoryLog.objects.bulk_create([
+            HistoryLog(topic=rng.choice(topics), action=rng.choice(actions),
+                       before_value=f"value {rng.randrange(1000)}", after_value=f"value {rng.randrange(1000)}")
+            for _ in range(options["history"])
+        ], batch_size=batch_size)
+
+        return len(courses)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+
+def backfill_minutes(apps, schema_editor):
+    CourseTime = apps.get_model('scheduler', 'CourseTime')
+    rows = []
+    for t in CourseTime.objects.all():
+        try:
+            hh, mm = map(int, t.name[:5].split(':'))
+            minutes = hh * 60 + mm
+        except ValueError:
+            continue
+        if 0 <= minutes < 24 * 60:
+            t.minutes_since_midnight = minutes
+            rows.append(t)
+    CourseTime.objects.bulk_update(rows, ['minutes_since_midnight'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0002_role_historylog_profile'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='coursetime',
+            options={'ordering': ['minutes_since_midnight', 'name']},
+        ),
+        migrations.AddField(
+            model_name='coursetime',
+            name='minutes_since_midnight',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_minutes, migrations.RunPython.noop),
+    ]
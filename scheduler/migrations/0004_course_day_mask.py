@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+DAY_BITS = {'Mon': 1, 'Tues': 2, 'Wed': 4, 'Thurs': 8, 'Fri': 16}
+
+
+def backfill_day_mask(apps, schema_editor):
+    Course = apps.get_model('scheduler', 'Course')
+    masks = {}
+    rows = Course.day.through.objects.values_list('course_id', 'courseday__name')
+    for course_id, name in rows.iterator(chunk_size=2000):
+        masks[course_id] = masks.get(course_id, 0) | DAY_BITS.get(name, 0)
+    courses = [Course(pk=pk, day_mask=mask) for pk, mask in masks.items()]
+    Course.objects.bulk_update(courses, ['day_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0003_coursetime_minutes_since_midnight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='day_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_day_mask, migrations.RunPython.noop),
+    ]
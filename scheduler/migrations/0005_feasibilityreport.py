@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0004_course_day_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeasibilityReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('feasible', 'Feasible'), ('infeasible', 'Infeasible'), ('timeout', 'Timed out'), ('error', 'Error')], max_length=20)),
+                ('course_count', models.PositiveIntegerField(default=0)),
+                ('unschedulable', models.JSONField(blank=True, default=list)),
+                ('conflicting_pairs', models.JSONField(blank=True, default=list)),
+                ('example', models.JSONField(blank=True, default=list)),
+                ('detail', models.TextField(blank=True)),
+                ('elapsed_ms', models.FloatField(default=0)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scheduler.courseyear')),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feasibility_reports', to='scheduler.program')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scheduler.courseterm')),
+            ],
+            options={
+                'ordering': ['academic_year__name', 'term__name', 'program__name__name', 'program__year_level__name'],
+                'unique_together': {('program', 'academic_year', 'term')},
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FIELDS = ['code__name', 'number__name', 'section__name', 'academic_year__name', 'term__name',
+          'day_mask', 'start_time__minutes_since_midnight', 'end_time__minutes_since_midnight']
+
+
+def backfill_course_search(apps, schema_editor):
+    Course = apps.get_model('scheduler', 'Course')
+    CourseSearch = apps.get_model('scheduler', 'CourseSearch')
+    rows = []
+    for pk, code, number, section, year, term, mask, start, end in (
+            Course.objects.values_list('id', *FIELDS).iterator(chunk_size=2000)):
+        rows.append(CourseSearch(course_id=pk, code=code or '', number=number or '', section=section or '',
+                                 academic_year=year or '', term=term or '', day_mask=mask,
+                                 start_minutes=start, end_minutes=end))
+        if len(rows) >= 2000:
+            CourseSearch.objects.bulk_create(rows)
+            rows = []
+    CourseSearch.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0005_feasibilityreport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearch',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search', serialize=False, to='scheduler.course')),
+                ('code', models.CharField(blank=True, max_length=20)),
+                ('number', models.CharField(blank=True, max_length=20)),
+                ('section', models.CharField(blank=True, max_length=20)),
+                ('academic_year', models.CharField(blank=True, max_length=20)),
+                ('term', models.CharField(blank=True, max_length=20)),
+                ('day_mask', models.PositiveSmallIntegerField(default=0)),
+                ('start_minutes', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('end_minutes', models.PositiveSmallIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['academic_year', 'code', 'number', 'section', 'term', 'course'], name='coursesearch_year_sort'), models.Index(fields=['code', 'number', 'section', 'academic_year', 'term', 'course'], name='coursesearch_sort'), models.Index(fields=['academic_year', 'term', 'code', 'number'], name='coursesearch_year_term')],
+            },
+        ),
+        migrations.RunPython(backfill_course_search, migrations.RunPython.noop),
+    ]
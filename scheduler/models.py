@@ -1,10 +1,43 @@
-from django.db import models
+import operator
+import threading
+from functools import partial, reduce
+
+from django.db import connection, models, transaction
+from django.db.models import CharField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast, Coalesce, Concat, Lower
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
-from django.db.models.signals import post_save, pre_delete, post_delete
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-    
+from .layout import DAYS, to_minutes
+from .caching import bump_lookup_version, bump_schedule_version, track_lookup_table
+
+
+def parse_minutes(name):
+    """ "HH:MM" -> minutes since midnight, or None if name is not a valid time """
+    try:
+        minutes = to_minutes(name or "")
+    except ValueError:
+        return None
+    return minutes if 0 <= minutes < 24 * 60 else None
+
+
+# one bit per weekday, used by Course.day_mask
+DAY_BITS = {name: 1 << i for i, name in enumerate(DAYS)}
+
+
+def day_mask_for(names):
+    mask = 0
+    for name in names:
+        mask |= DAY_BITS.get(name, 0)
+    return mask
+
+
+def day_names_for(mask):
+    """ day_mask -> ["Mon", "Wed", ...] in weekday order """
+    return [name for name in DAYS if mask & DAY_BITS[name]]
+
 
 class CourseTerm(models.Model):
     name = models.CharField(max_length=20, unique=True)
@@ -45,9 +78,18 @@ class CourseSection(models.Model):
 
 class CourseTime(models.Model):
     name = models.CharField(max_length=20, unique=True)
+    # "HH:MM" as an integer, kept in sync with name so time math and ordering never parse strings
+    minutes_since_midnight = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, db_index=True)
     
     class Meta:
-        ordering = ['name']
+        ordering = ['minutes_since_midnight', 'name']
+
+    def save(self, *args, **kwargs):
+        self.minutes_since_midnight = parse_minutes(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "minutes_since_midnight"}
+        super().save(*args, **kwargs)
         
     def __str__(self):
         return self.name
@@ -97,30 +139,33 @@ class Course(models.Model):
     start_time = models.ForeignKey(CourseTime, on_delete=models.SET_NULL, null=True, blank=True, related_name="start_time")
     end_time = models.ForeignKey(CourseTime, on_delete=models.SET_NULL, null=True, blank=True, related_name="end_time")
     day = models.ManyToManyField(CourseDay, blank=True, related_name="courses")
+    # denormalized copy of `day` (see DAY_BITS), kept in sync by _days_changed
+    day_mask = models.PositiveSmallIntegerField(default=0, editable=False)
     slug = models.SlugField(max_length=256, unique=True)    # URL-friendly identifier
 
     class Meta:
         unique_together = ['code', 'number', 'section', 'academic_year', 'term']
 
-    def save(self, *args, **kwargs):
+    def build_slug(self):
+        """ slug from the related names and pk; bulk paths call this directly instead of save() """
         def part(obj):
             return getattr(obj, "name", None) or "None"
-        
+
+        return slugify(
+            f"{part(self.code)}-{part(self.number)}-{part(self.section)}-"
+            f"{part(self.academic_year)}-{part(self.term)}-{self.pk}"
+        )
+
+    def save(self, *args, **kwargs):
         creating = self.pk is None  # check if this is a new object
         
         if creating:
             super().save(*args, **kwargs)  # save first so pk is assigned
-            self.slug = slugify(
-                f"{part(self.code)}-{part(self.number)}-{part(self.section)}-"
-                f"{part(self.academic_year)}-{part(self.term)}-{self.pk}"
-            )
+            self.slug = self.build_slug()
             # update only the slug field
             super().save(update_fields=["slug"])
         else:
-            self.slug = slugify(
-                f"{part(self.code)}-{part(self.number)}-{part(self.section)}-"
-                f"{part(self.academic_year)}-{part(self.term)}-{self.pk}"
-            )
+            self.slug = self.build_slug()
             super().save(*args, **kwargs)
 
     def __str__(self):
@@ -134,93 +179,382 @@ class Program(models.Model):
         
     def __str__(self):
         return f"{self.name} {self.year_level.name}"
-    
 
-def _reslug_courses(qs):
-    qs = qs.select_related("code", "number", "section", "academic_year", "term")
-    for c in qs:
-        # triggers Course.save() which recomputes slug
-        c.save(update_fields=["slug"])
 
-# --- when a related 'name' changes, recompute slugs for linked courses ---
+class CourseSearch(models.Model):
+    """
+    Search projection of a Course: its lookup names ("" when unset), day mask and
+    start/end minutes in one row, so course searches filter and sort on indexed
+    columns instead of five joined name columns. Kept current by the course
+    refresh below; rebuild_course_search and check_course_search repair and verify it.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="search")
+    code = models.CharField(max_length=20, blank=True)
+    number = models.CharField(max_length=20, blank=True)
+    section = models.CharField(max_length=20, blank=True)
+    academic_year = models.CharField(max_length=20, blank=True)
+    term = models.CharField(max_length=20, blank=True)
+    day_mask = models.PositiveSmallIntegerField(default=0)
+    start_minutes = models.PositiveSmallIntegerField(null=True, blank=True)
+    end_minutes = models.PositiveSmallIntegerField(null=True, blank=True)
 
-@receiver(post_save, sender=CourseCode)
-def _code_changed(sender, instance, **kwargs):
-    _reslug_courses(Course.objects.filter(code=instance))
+    class Meta:
+        indexes = [
+            # view_courses: one or more years, ordered (and keyset-paged) on code, number, section, year, term, id
+            models.Index(fields=["academic_year", "code", "number", "section", "term", "course"],
+                         name="coursesearch_year_sort"),
+            models.Index(fields=["code", "number", "section", "academic_year", "term", "course"],
+                         name="coursesearch_sort"),
+            # landing page: one year, a few terms, optionally codes and numbers
+            models.Index(fields=["academic_year", "term", "code", "number"], name="coursesearch_year_term"),
+        ]
 
-@receiver(post_save, sender=CourseNumber)
-def _number_changed(sender, instance, **kwargs):
-    _reslug_courses(Course.objects.filter(number=instance))
+    def __str__(self):
+        return f"{self.code} {self.number} {self.section} ({self.academic_year}, {self.term})"
 
-@receiver(post_save, sender=CourseSection)
-def _section_changed(sender, instance, **kwargs):
-    _reslug_courses(Course.objects.filter(section=instance))
 
-@receiver(post_save, sender=CourseYear)
-def _year_changed(sender, instance, **kwargs):
-    _reslug_courses(Course.objects.filter(academic_year=instance))
+SEARCH_FIELDS = ["code", "number", "section", "academic_year", "term", "day_mask", "start_minutes", "end_minutes"]
+# what search_row_for reads from a Course, for only()
+SEARCH_SOURCE_FIELDS = ["code__name", "number__name", "section__name", "academic_year__name", "term__name",
+                        "day_mask", "start_time__minutes_since_midnight", "end_time__minutes_since_midnight"]
 
-@receiver(post_save, sender=CourseTerm)
-def _term_changed(sender, instance, **kwargs):
-    _reslug_courses(Course.objects.filter(term=instance))
 
-# --- when a related row is deleted (on_delete=SET_NULL), recompute slugs ---
+def search_row_for(course):
+    """ the CourseSearch row of a course whose related rows are loaded (or attached, before a bulk insert) """
+    def name(obj):
+        return getattr(obj, "name", None) or ""
+
+    def minutes(obj):
+        return getattr(obj, "minutes_since_midnight", None)
+
+    return CourseSearch(
+        course_id=course.pk, code=name(course.code), number=name(course.number), section=name(course.section),
+        academic_year=name(course.academic_year), term=name(course.term), day_mask=course.day_mask,
+        start_minutes=minutes(course.start_time), end_minutes=minutes(course.end_time),
+    )
 
-# capture affected Course IDs before the FK row is removed
-@receiver(pre_delete, sender=CourseCode)
-def _code_pre_delete(sender, instance, **kwargs):
-    instance._affected_course_ids = list(instance.course_set.values_list("id", flat=True))
 
-@receiver(pre_delete, sender=CourseNumber)
-def _number_pre_delete(sender, instance, **kwargs):
-    instance._affected_course_ids = list(instance.course_set.values_list("id", flat=True))
+def stale_search_row(course):
+    """
+    The recomputed search row of a course loaded with select_related("search") (see
+    refreshable_courses), or None when the stored row is already current.
+    """
+    row = search_row_for(course)
+    stored = getattr(course, "search", None)
+    if stored is None or any(getattr(stored, name) != getattr(row, name) for name in SEARCH_FIELDS):
+        return row
+    return None
 
-@receiver(pre_delete, sender=CourseSection)
-def _section_pre_delete(sender, instance, **kwargs):
-    instance._affected_course_ids = list(instance.course_set.values_list("id", flat=True))
 
-@receiver(pre_delete, sender=CourseYear)
-def _year_pre_delete(sender, instance, **kwargs):
-    instance._affected_course_ids = list(instance.course_set.values_list("id", flat=True))
+def refreshable_courses(courses):
+    """ courses with everything search_row_for, build_slug and stale_search_row read, in one joined query """
+    return (courses
+            .select_related("code", "number", "section", "academic_year", "term", "start_time", "end_time", "search")
+            .only("slug", *SEARCH_SOURCE_FIELDS, *(f"search__{name}" for name in SEARCH_FIELDS)))
 
-@receiver(pre_delete, sender=CourseTerm)
-def _term_pre_delete(sender, instance, **kwargs):
-    instance._affected_course_ids = list(instance.course_set.values_list("id", flat=True))
 
-def _cleanup_or_reslug_after_delete(instance):
-    ids = getattr(instance, "_affected_course_ids", [])
-    if not ids:
+def write_search_rows(rows, batch_size=2500):
+    """ insert or overwrite CourseSearch rows in bulk """
+    CourseSearch.objects.bulk_create(rows, batch_size=batch_size, update_conflicts=True,
+                                     unique_fields=["course"], update_fields=SEARCH_FIELDS)
+    
+
+# --- keep Course.day_mask in sync with the Course.day M2M ---
+
+def _sync_day_masks(course_ids):
+    masks = dict.fromkeys(course_ids, 0)
+    rows = (Course.day.through.objects
+            .filter(course_id__in=masks)
+            .values_list("course_id", "courseday__name"))
+    for course_id, name in rows:
+        masks[course_id] |= DAY_BITS.get(name, 0)
+    courses = [Course(pk=pk, day_mask=mask) for pk, mask in masks.items()]
+    Course.objects.bulk_update(courses, ["day_mask"], batch_size=500)
+    queue_course_refresh(course_ids=masks)
+
+@receiver(m2m_changed, sender=Course.day.through)
+def _days_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # instance is a CourseDay, pk_set holds Course ids
+        if action == "pre_clear":
+            instance._cleared_course_ids = list(instance.courses.values_list("id", flat=True))
+        elif action in ("post_add", "post_remove"):
+            _sync_day_masks(pk_set)
+        elif action == "post_clear":
+            _sync_day_masks(getattr(instance, "_cleared_course_ids", []))
         return
-    # delete any courses now have BOTH code & number null
-    Course.objects.filter(id__in=ids, code__isnull=True, number__isnull=True).delete()
-    # re-slug the still-existing courses
-    remaining = Course.objects.filter(id__in=ids)
-    _reslug_courses(remaining)
-
-@receiver(post_delete, sender=CourseCode)
-def _code_post_delete(sender, instance, **kwargs):
-    # _reslug_after_delete(instance)
-    _cleanup_or_reslug_after_delete(instance)
-
-@receiver(post_delete, sender=CourseNumber)
-def _number_post_delete(sender, instance, **kwargs):
-    # _reslug_after_delete(instance)
-    _cleanup_or_reslug_after_delete(instance)
-
-@receiver(post_delete, sender=CourseSection)
-def _section_post_delete(sender, instance, **kwargs):
-    # _reslug_after_delete(instance)
-    _cleanup_or_reslug_after_delete(instance)
-
-@receiver(post_delete, sender=CourseYear)
-def _year_post_delete(sender, instance, **kwargs):
-    # _reslug_after_delete(instance)
-    _cleanup_or_reslug_after_delete(instance)
-
-@receiver(post_delete, sender=CourseTerm)
-def _term_post_delete(sender, instance, **kwargs):
-    # _reslug_after_delete(instance)
-    _cleanup_or_reslug_after_delete(instance)
+
+    if action in ("post_add", "post_remove", "post_clear"):
+        instance.day_mask = day_mask_for(instance.day.values_list("name", flat=True))
+        Course.objects.filter(pk=instance.pk).update(day_mask=instance.day_mask)
+        queue_course_refresh(course_ids=[instance.pk])
+
+
+# --- slug and search row recomputation, coalesced per transaction and written in bulk after commit ---
+
+REFRESH_BATCH_SIZE = 2500
+_refresh_state = threading.local()
+
+
+class _RefreshBatch:
+    def __init__(self):
+        self.lookups = {}  # Course FK field -> {lookup pk}
+        self.course_ids = set()
+        self.reslug_ids = set()  # courses that lost a slug lookup to a delete
+        self.flush = partial(flush_course_refresh, self)
+
+
+def _pending_refresh():
+    """
+    The batch already queued at the current savepoint level, if any. A batch is only
+    reused while its flush is still registered with the same savepoints: rolling one
+    back discards the flush, and the next change starts a new batch instead of adding
+    to one that will never run (or that would flush changes that never happened).
+    """
+    batch = getattr(_refresh_state, "batch", None)
+    if batch is None:
+        return None
+    sids = set(connection.savepoint_ids)
+    if any(func is batch.flush and registered == sids for registered, func, _ in connection.run_on_commit):
+        return batch
+    return None
+
+
+def queue_course_refresh(field=None, pk=None, course_ids=(), reslug_ids=()):
+    """
+    Mark courses for a slug and CourseSearch recompute once the current transaction
+    commits: those whose `field` (e.g. "term") points at `pk`, and/or `course_ids`.
+    `reslug_ids` only need their slug rebuilt, which is done in SQL. Edits made in
+    one transaction are coalesced, so renaming several lookups still reads and
+    writes each affected course once.
+    """
+    pending = _pending_refresh()
+    fresh = pending is None
+    if fresh:
+        pending = _refresh_state.batch = _RefreshBatch()
+    if field is not None:
+        pending.lookups.setdefault(field, set()).add(pk)
+    pending.course_ids.update(course_ids)
+    pending.reslug_ids.update(reslug_ids)
+    if fresh:
+        # registered once per batch; outside a transaction this flushes right away
+        transaction.on_commit(pending.flush)
+
+
+# Course FK field -> (CourseSearch column, lookup attribute it copies)
+SEARCH_COLUMNS = {
+    "code": ("code", "name"),
+    "number": ("number", "name"),
+    "section": ("section", "name"),
+    "academic_year": ("academic_year", "name"),
+    "term": ("term", "name"),
+    "start_time": ("start_minutes", "minutes_since_midnight"),
+    "end_time": ("end_minutes", "minutes_since_midnight"),
+}
+SLUG_FIELDS = {"code", "number", "section", "academic_year", "term"}
+
+
+def _set_search_column(field, lookup_pk, value):
+    """ one UPDATE of a projected column for every course whose `field` points at lookup_pk """
+    column = SEARCH_COLUMNS[field][0]
+    return (CourseSearch.objects.filter(**{f"course__{field}": lookup_pk})
+            .exclude(**{column: value}).update(**{column: value}))
+
+
+# slugify only lowercases such a name, so slugs made of them can be built in SQL
+PLAIN_NAME = r"^[A-Za-z0-9]+$"
+
+
+def _reslug(course_ids):
+    """
+    Rebuild the slugs of `course_ids`. Courses whose lookup names are all plain get
+    theirs from one UPDATE; the rest (rare) are read and rebuilt by build_slug.
+    """
+    courses = Course.objects.filter(id__in=course_ids)
+    parts = []
+    for field in ("code", "number", "section", "academic_year", "term"):
+        model = Course._meta.get_field(field).related_model
+        name = Subquery(model.objects.filter(pk=OuterRef(field)).values(lowered=Lower("name"))[:1])
+        parts += [Coalesce(name, Value("none")), Value("-")]
+    plain = reduce(operator.and_, (Q(**{f"{field}__isnull": True}) | Q(**{f"{field}__name__regex": PLAIN_NAME})
+                                   for field in SLUG_FIELDS))
+    changed = courses.filter(plain).update(slug=Concat(*parts, Cast("id", CharField()), output_field=CharField()))
+
+    rest = list(courses.exclude(plain).select_related("code", "number", "section", "academic_year", "term")
+                .only("slug", "code__name", "number__name", "section__name", "academic_year__name", "term__name"))
+    for c in rest:
+        c.slug = c.build_slug()
+    Course.objects.bulk_update(rest, ["slug"], batch_size=REFRESH_BATCH_SIZE)
+    return changed + len(rest)
+
+
+def flush_course_refresh(pending):
+    """
+    Apply the changes queued in the `pending` batch. A renamed lookup's search column
+    is set with one UPDATE per lookup, and the courses a deleted lookup left behind
+    are reslugged in SQL, REFRESH_BATCH_SIZE ids at a time. Queued course ids are read in batches together with their stored search
+    row, then the courses of all renamed lookups in one joined SELECT (slugs only).
+    Per REFRESH_BATCH_SIZE courses one bulk_update(["slug"]) and one CourseSearch
+    upsert follow, each only for the rows that changed.
+    """
+    if getattr(_refresh_state, "batch", None) is pending:
+        _refresh_state.batch = None  # changes queued from here on go into a new batch
+    lookups, course_ids, reslug_ids = pending.lookups, sorted(pending.course_ids), sorted(pending.reslug_ids)
+    pending.lookups, pending.course_ids, pending.reslug_ids = {}, set(), set()
+    if not lookups and not course_ids and not reslug_ids:
+        return
+
+    # queued ids first: their search rows are recomputed too, renamed lookups' courses only need slugs
+    passes = [(refreshable_courses(Course.objects.filter(id__in=course_ids[i:i + REFRESH_BATCH_SIZE])), True)
+              for i in range(0, len(course_ids), REFRESH_BATCH_SIZE)]
+    slug_lookups = {field: pks for field, pks in lookups.items() if field in SLUG_FIELDS}
+    if slug_lookups:
+        passes.append((
+            Course.objects.filter(reduce(operator.or_, (Q(**{f"{field}__in": pks}) for field, pks in slug_lookups.items())))
+            .select_related("code", "number", "section", "academic_year", "term")
+            .only("slug", "code__name", "number__name", "section__name", "academic_year__name", "term__name"),
+            False,
+        ))
+    changed = 0
+
+    def write(slugs, rows):
+        if slugs:
+            Course.objects.bulk_update(slugs, ["slug"])
+        if rows:
+            write_search_rows(rows)
+        return len(slugs) + len(rows)
+
+    with transaction.atomic():
+        for field, pks in lookups.items():
+            attr = SEARCH_COLUMNS[field][1]
+            model = Course._meta.get_field(field).related_model
+            for pk, value in model.objects.filter(pk__in=pks).values_list("pk", attr):
+                changed += _set_search_column(field, pk, "" if value is None and attr == "name" else value)
+        for i in range(0, len(reslug_ids), REFRESH_BATCH_SIZE):
+            changed += _reslug(reslug_ids[i:i + REFRESH_BATCH_SIZE])
+
+        seen = set()
+        for qs, with_search in passes:
+            slugs, rows = [], []
+            for c in qs.iterator(chunk_size=REFRESH_BATCH_SIZE):
+                if c.pk in seen:
+                    continue
+                seen.add(c.pk)
+                slug = c.build_slug()
+                if slug != c.slug:
+                    c.slug = slug
+                    slugs.append(c)
+                row = stale_search_row(c) if with_search else None
+                if row is not None:
+                    rows.append(row)
+                if len(slugs) >= REFRESH_BATCH_SIZE or len(rows) >= REFRESH_BATCH_SIZE:
+                    changed += write(slugs, rows)
+                    slugs, rows = [], []
+            changed += write(slugs, rows)
+        if changed:
+            # bulk writes and update() send no post_save
+            bump_schedule_version()
+
+# --- a saved course refreshes its own row ---
+
+@receiver(post_save, sender=Course)
+def _course_saved(sender, instance, **kwargs):
+    queue_course_refresh(course_ids=[instance.pk])
+
+# --- when a related 'name' changes, recompute slugs and search rows of linked courses ---
+
+@receiver(post_save, sender=CourseCode)
+def _code_changed(sender, instance, created, **kwargs):
+    if not created:
+        queue_course_refresh("code", instance.pk)
+
+@receiver(post_save, sender=CourseNumber)
+def _number_changed(sender, instance, created, **kwargs):
+    if not created:
+        queue_course_refresh("number", instance.pk)
+
+@receiver(post_save, sender=CourseSection)
+def _section_changed(sender, instance, created, **kwargs):
+    if not created:
+        queue_course_refresh("section", instance.pk)
+
+@receiver(post_save, sender=CourseYear)
+def _year_changed(sender, instance, created, **kwargs):
+    if not created:
+        queue_course_refresh("academic_year", instance.pk)
+
+@receiver(post_save, sender=CourseTerm)
+def _term_changed(sender, instance, created, **kwargs):
+    if not created:
+        queue_course_refresh("term", instance.pk)
+
+@receiver(post_save, sender=CourseTime)
+def _time_changed(sender, instance, created, **kwargs):
+    # only search rows change: times are not part of the slug
+    if not created:
+        queue_course_refresh("start_time", instance.pk)
+        queue_course_refresh("end_time", instance.pk)
+
+# --- when a related row is deleted (on_delete=SET_NULL), recompute slugs and search rows ---
+
+# Course FK field of each lookup, and the other field whose absence makes a course an orphan
+# (a course with neither code nor number is deleted with the last of the two)
+_LOOKUP_FIELDS = {
+    CourseCode: ("code", "number"),
+    CourseNumber: ("number", "code"),
+    CourseSection: ("section", None),
+    CourseYear: ("academic_year", None),
+    CourseTerm: ("term", None),
+}
+
+def _lookup_pre_delete(sender, instance, **kwargs):
+    """
+    Runs once per deleted lookup, also for queryset and admin bulk deletes, before
+    on_delete=SET_NULL clears the FKs: drops the courses this delete would orphan,
+    blanks the survivors' search column and queues their ids, whose slugs the flush
+    rebuilds once the FKs are cleared. A constant number of statements, however
+    many courses point at the lookup.
+    """
+    field, other = _LOOKUP_FIELDS[sender]
+    if other is not None:
+        Course.objects.filter(**{field: instance, f"{other}__isnull": True}).delete()
+    _set_search_column(field, instance.pk, "")
+    queue_course_refresh(reslug_ids=Course.objects.filter(**{field: instance}).values_list("id", flat=True))
+
+for _model in _LOOKUP_FIELDS:
+    pre_delete.connect(_lookup_pre_delete, sender=_model, dispatch_uid=f"lookup_pre_delete_{_model.__name__}")
+
+@receiver(pre_delete, sender=CourseTime)
+def _time_pre_delete(sender, instance, **kwargs):
+    # times are not part of the slug; only the projected minutes go
+    _set_search_column("start_time", instance.pk, None)
+    _set_search_column("end_time", instance.pk, None)
+
+
+# --- any change to schedule data invalidates cached timetable layouts ---
+
+# small tables the views and CourseForm read in full; each has its own version (see caching.lookup_cache)
+LOOKUP_MODELS = (CourseTerm, CourseCode, CourseNumber, CourseSection, CourseTime, CourseDay,
+                 CourseYear, ProgramYearLevel, ProgramName)
+for _model in LOOKUP_MODELS:
+    track_lookup_table(_model)
+
+
+def _schedule_changed(sender, **kwargs):
+    # m2m_changed also fires pre_* actions; only count the ones that happened
+    action = kwargs.get("action")
+    if action is None or action.startswith("post_"):
+        bump_schedule_version()
+        if sender in LOOKUP_MODELS:
+            bump_lookup_version(sender)
+
+for _model in (CourseTerm, CourseCode, CourseNumber, CourseSection, CourseTime, CourseDay,
+               CourseYear, ProgramYearLevel, ProgramName, Course, Program):
+    post_save.connect(_schedule_changed, sender=_model, dispatch_uid=f"schedule_changed_save_{_model.__name__}")
+    post_delete.connect(_schedule_changed, sender=_model, dispatch_uid=f"schedule_changed_delete_{_model.__name__}")
+
+m2m_changed.connect(_schedule_changed, sender=Course.day.through, dispatch_uid="schedule_changed_course_day")
+m2m_changed.connect(_schedule_changed, sender=Program.courses.through, dispatch_uid="schedule_changed_program_courses")
 
 
 class HistoryTopic(models.TextChoices):
@@ -274,3 +608,34 @@ class Profile(models.Model):
 
     def __str__(self):
         return f"{self.user.username} ({self.role})"
+
+
+class FeasibilityStatus(models.TextChoices):
+    FEASIBLE   = "feasible", "Feasible"
+    INFEASIBLE = "infeasible", "Infeasible"
+    TIMEOUT    = "timeout", "Timed out"
+    ERROR      = "error", "Error"
+
+
+class FeasibilityReport(models.Model):
+    """ latest check_feasibility result for one program in one academic year and term """
+    program       = models.ForeignKey(Program, on_delete=models.CASCADE, related_name="feasibility_reports")
+    academic_year = models.ForeignKey(CourseYear, on_delete=models.CASCADE)
+    term          = models.ForeignKey(CourseTerm, on_delete=models.CASCADE)
+    status        = models.CharField(max_length=20, choices=FeasibilityStatus.choices)
+    course_count  = models.PositiveIntegerField(default=0)
+    # "CODE NUMBER" labels: required courses with no placeable section, and pairs that always clash
+    unschedulable     = models.JSONField(default=list, blank=True)
+    conflicting_pairs = models.JSONField(default=list, blank=True)
+    # one clash-free pick of sections when the program is feasible
+    example       = models.JSONField(default=list, blank=True)
+    detail        = models.TextField(blank=True)
+    elapsed_ms    = models.FloatField(default=0)
+    checked_at    = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['program', 'academic_year', 'term']
+        ordering = ['academic_year__name', 'term__name', 'program__name__name', 'program__year_level__name']
+
+    def __str__(self):
+        return f"{self.program} {self.academic_year} {self.term}: {self.get_status_display()}"
@@ -0,0 +1,92 @@
+'''
+Keyset ("seek") pagination for course searches.
+
+A page is the first rows after (or before) the edge row the client last saw, in
+(code, number, section, year, term, id) order, and its cursor carries that row's
+sort key. Each page is one query: a WHERE on the key plus LIMIT, with no COUNT(*)
+and no OFFSET, so page 1,500 of a search costs what page 1 does. The key columns
+come from the CourseSearch projection, whose composite indexes cover this order.
+
+A missing lookup is stored as "" there, which keeps the order total and the same
+on every backend (SQLite and PostgreSQL put NULLs at opposite ends).
+
+Cursors are signed. A tampered or malformed token is ignored and the search starts
+again at its first page.
+'''
+from django.core import signing
+from django.db.models import F, Q
+
+PAGE_SIZE = 20
+CURSOR_SALT = "scheduler.course_cursor"
+SEEK_FIELDS = ["search__code", "search__number", "search__section", "search__academic_year", "search__term"]
+SEEK_KEYS = [f"seek_{i}" for i in range(len(SEEK_FIELDS))] + ["id"]
+
+
+def encode_cursor(key, direction):
+    return signing.dumps([direction, *key], salt=CURSOR_SALT)
+
+
+def decode_cursor(token):
+    """ (direction, key) of a cursor token, or None when it is missing or invalid """
+    if not token:
+        return None
+    try:
+        direction, *key = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if (direction not in ("next", "prev") or len(key) != len(SEEK_KEYS)
+            or not all(isinstance(v, str) for v in key[:-1]) or not isinstance(key[-1], int)):
+        return None
+    return direction, key
+
+
+def _seek(key, descending):
+    """ rows strictly after `key` in SEEK_KEYS order (before it when descending) """
+    lookup = "lt" if descending else "gt"
+    q = Q()
+    for i, name in enumerate(SEEK_KEYS):
+        q |= Q(**dict(zip(SEEK_KEYS[:i], key[:i])), **{f"{name}__{lookup}": key[i]})
+    # implied by the OR, but a bound on the leading column is what lets the planner
+    # start a range scan of the sort index at the cursor instead of at the first row
+    return Q(**{f"{SEEK_KEYS[0]}__{lookup}e": key[0]}) & q
+
+
+def _key_of(row):
+    return [getattr(row, name) for name in SEEK_KEYS]
+
+
+def keyset_page(courses, cursor=None, per_page=PAGE_SIZE):
+    """
+    courses: a Course queryset (any ordering is replaced). Returns a dict with
+    object_list, has_next/has_previous and next_cursor/prev_cursor tokens.
+    """
+    courses = courses.annotate(**{
+        name: F(field) for name, field in zip(SEEK_KEYS, SEEK_FIELDS)
+    })
+    ascending = SEEK_KEYS
+    descending = [f"-{name}" for name in SEEK_KEYS]
+
+    decoded = decode_cursor(cursor)
+    if decoded is None:
+        rows = list(courses.order_by(*ascending)[:per_page + 1])
+        has_next, has_previous = len(rows) > per_page, False
+        rows = rows[:per_page]
+    elif decoded[0] == "next":
+        rows = list(courses.filter(_seek(decoded[1], False)).order_by(*ascending)[:per_page + 1])
+        has_next, has_previous = len(rows) > per_page, True
+        rows = rows[:per_page]
+    else:
+        rows = list(courses.filter(_seek(decoded[1], True)).order_by(*descending)[:per_page + 1])
+        has_next, has_previous = True, len(rows) > per_page
+        rows = rows[:per_page][::-1]
+
+    # an empty page (its rows were deleted meanwhile) still links back across the cursor
+    first = _key_of(rows[0]) if rows else decoded and decoded[1]
+    last = _key_of(rows[-1]) if rows else decoded and decoded[1]
+    return {
+        "object_list": rows,
+        "has_next": has_next,
+        "has_previous": has_previous,
+        "next_cursor": encode_cursor(last, "next") if has_next else None,
+        "prev_cursor": encode_cursor(first, "prev") if has_previous else None,
+    }
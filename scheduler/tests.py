@@ -1,3 +1,859 @@
-from django.test import TestCase
+import importlib
+import itertools
+import random
+import time
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import HttpRequest, HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from timetable.testing import QueryBudgetMixin
+
+from .caching import LayoutCache, bump_schedule_version, layout_cache_key
+from .ical import calendar_lines
+from .conflicts import check_feasibility, day_patterns, find_combinations, rank_placements, week_bitmap
+from .layout import DAYS, layout_courses, overlap_depths, to_minutes
+from .importer import ScheduleImportError, apply_import, plan_import, read_schedule
+from .pagination import keyset_page
+from .typeahead import course_index
+from .models import (
+    Course, CourseCode, CourseDay, CourseNumber, CourseSearch, CourseSection, CourseTerm, CourseTime, CourseYear,
+    FeasibilityReport, Program, ProgramName, ProgramYearLevel, day_mask_for, flush_course_refresh,
+)
+
+
+def _reference_day_data(courses):
+    """
+    The original quadratic "Chain widths" loop from landing_page, kept here
+    as the oracle for the layout engine.
+    courses: list of dicts {"id", "days", "start": "HH:MM", "end": "HH:MM"}
+    """
+    def _mins(hhmm):
+        hh, mm = map(int, hhmm.split(":"))
+        return hh * 60 + mm
+
+    day_to_courses = {d: [] for d in DAYS}
+    for c in courses:
+        for d in c["days"]:
+            day_to_courses[d].append(c)
+    for d in day_to_courses:
+        day_to_courses[d].sort(key=lambda c: (_mins(c["start"]), c["id"]))
+
+    result = {c["id"]: {d: {"overlap": None, "width": None, "left": None, "z": None} for d in DAYS}
+              for c in courses}
+    for day_key, day_list in day_to_courses.items():
+        for idx, c in enumerate(day_list):
+            c_start = _mins(c["start"])
+            predecessors = 0
+            for prev in day_list[:idx]:
+                if _mins(prev["start"]) <= c_start < _mins(prev["end"]):
+                    predecessors += 1
+            k = predecessors
+            result[c["id"]][day_key] = {
+                "overlap": k > 0,
+                "width": round(100.0 * (0.9 ** k), 2),
+                "left": None,
+                "z": 100 + k,
+            }
+    return result
+
+
+def _random_courses(rng, n):
+    courses = []
+    for course_id in rng.sample(range(1, 10 * n + 10), n):
+        start = rng.randrange(8 * 60, 21 * 60)
+        # mostly sensible lengths, with the odd zero-length or inverted row
+        end = start + rng.choice([0, 30, 50, 60, 80, 90, 120, 180])
+        if rng.random() < 0.05:
+            end = rng.randrange(0, 24 * 60)
+        end = min(end, 24 * 60 - 1)
+        courses.append({
+            "id": course_id,
+            "days": sorted(rng.sample(DAYS, rng.randint(1, 5)), key=DAYS.index),
+            "start": f"{start // 60:02d}:{start % 60:02d}",
+            "end": f"{end // 60:02d}:{end % 60:02d}",
+        })
+    return courses
+
+
+class LayoutEngineTests(SimpleTestCase):
+    def _layout(self, courses):
+        return layout_courses(
+            (c["id"], c["days"], to_minutes(c["start"]), to_minutes(c["end"])) for c in courses
+        )
+
+    def test_matches_reference_for_random_timetables(self):
+        rng = random.Random(20240901)
+        for _ in range(300):
+            courses = _random_courses(rng, rng.randint(0, 60))
+            expected = _reference_day_data(courses)
+            placements = self._layout(courses)
+            for c in courses:
+                self.assertEqual(placements[c["id"]]["day_data"], expected[c["id"]])
+
+    def test_chained_overlaps_shrink_width(self):
+        depths = overlap_depths([(1, 480, 600), (2, 500, 560), (3, 510, 530), (4, 600, 660)])
+        self.assertEqual(depths, {1: 0, 2: 1, 3: 2, 4: 0})
+
+    def test_same_start_is_ordered_by_key(self):
+        depths = overlap_depths([(7, 540, 600), (3, 540, 600)])
+        self.assertEqual(depths, {3: 0, 7: 1})
+
+    def test_duration_and_offset(self):
+        placement = layout_courses([(1, ["Mon"], to_minutes("09:30"), to_minutes("10:50"))])[1]
+        self.assertEqual(placement["duration"], 80)
+        self.assertEqual(placement["offset_top"], 30)
+        self.assertIsNone(placement["day_data"]["Tues"]["z"])
+
+
+class LayoutCacheTests(SimpleTestCase):
+    FILTERS = {"year": "2025", "terms": ["T1", "T2"], "pname": "", "plevel": "",
+               "course_filters": [{"code": "FNH", "numbers": ["300", "200"]}, {"code": "APBI", "numbers": []}]}
+
+    def test_hits_evict_the_least_recently_used_and_clear_on_a_new_version(self):
+        cache = LayoutCache(max_entries=2)
+        cache.set("a", 1, "A")
+        cache.set("b", 1, "B")
+        self.assertEqual(cache.get("a", 1), "A")  # a hit, and now the most recently used
+        cache.set("c", 1, "C")
+        self.assertEqual([cache.get(k, 1) for k in "abc"], ["A", None, "C"])
+
+        self.assertIsNone(cache.get("a", 2))  # the version moved on: everything computed before is gone
+        self.assertIsNone(cache.get("c", 2))
+
+    def test_key_ignores_order_duplicates_and_a_level_without_a_program(self):
+        key = layout_cache_key(self.FILTERS)
+        reordered = {**self.FILTERS, "terms": ["T2", "T1", "T2"], "plevel": "2", "course_filters": [
+            {"code": "APBI", "numbers": []}, {"code": "FNH", "numbers": ["200", "300", "200"]}]}
+        self.assertEqual(layout_cache_key(reordered), key)
+        self.assertNotEqual(layout_cache_key({**reordered, "pname": "FNH"}),
+                            layout_cache_key({**reordered, "pname": "FNH", "plevel": "1"}))
+
+
+class ConflictBitmapTests(SimpleTestCase):
+    def test_bitmaps_clash_only_on_shared_minutes(self):
+        mon_wed = week_bitmap(["Mon", "Wed"], 540, 600)
+        self.assertTrue(mon_wed & week_bitmap(["Wed"], 590, 650))
+        self.assertFalse(mon_wed & week_bitmap(["Wed"], 600, 650))  # back to back
+        self.assertFalse(mon_wed & week_bitmap(["Tues"], 540, 600))
+        self.assertEqual(week_bitmap(["Fri"], 600, 600), 0)
+
+    def test_rank_by_conflicts_then_overlap(self):
+        peers = [("a", week_bitmap(["Mon"], 540, 600)), ("b", week_bitmap(["Mon"], 540, 600)),
+                 ("c", week_bitmap(["Tues"], 580, 640))]
+        candidates = [
+            ("mon", week_bitmap(["Mon"], 550, 610)),
+            ("tues", week_bitmap(["Tues"], 600, 660)),
+            ("wed", week_bitmap(["Wed"], 540, 600)),
+            ("tues_late", week_bitmap(["Tues"], 630, 690)),
+        ]
+        ranked = rank_placements(candidates, peers)
+        self.assertEqual(ranked, [
+            ("wed", 0, 0, []),
+            ("tues_late", 1, 10, ["c"]),
+            ("tues", 1, 40, ["c"]),
+            ("mon", 2, 100, ["a", "b"]),
+        ])
+        self.assertEqual(len(day_patterns(2)), 10)
+
+    def test_combinations_match_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            groups = []
+            for g in range(rng.randint(1, 6)):
+                groups.append([
+                    (f"{g}-{s}", week_bitmap(rng.sample(DAYS, rng.randint(1, 2)), start, start + 50))
+                    for s, start in enumerate(rng.sample(range(480, 1080, 30), rng.randint(1, 4)))
+                ])
+            expected = {
+                tuple(option for option, _ in pick)
+                for pick in itertools.product(*groups)
+                if all(not a[1] & b[1] for a, b in itertools.combinations(pick, 2))
+            }
+            result = find_combinations(groups)
+            found = {pick for combination in result["combinations"] for pick in itertools.product(*combination)}
+            self.assertTrue(result["exhausted"])
+            self.assertEqual(found, expected)
+
+    def test_combinations_stop_at_limit(self):
+        groups = [[(s, week_bitmap(["Mon"], 480 + 60 * s, 530 + 60 * s)) for s in range(5)]] * 3
+        result = find_combinations(groups, limit=4)
+        self.assertEqual(len(result["combinations"]), 4)
+        self.assertFalse(result["exhausted"])
+
+    def test_feasibility_reports_always_clashing_pairs(self):
+        mon9 = week_bitmap(["Mon"], 540, 600)
+        groups = {
+            "A 100": [("001", mon9)],
+            "B 100": [("001", mon9), ("002", week_bitmap(["Mon"], 570, 630))],
+            "C 100": [("001", week_bitmap(["Tues"], 540, 600))],
+        }
+        report = check_feasibility(groups)
+        self.assertEqual(report["status"], "infeasible")
+        self.assertEqual(report["conflicting_pairs"], [["A 100", "B 100"]])
+
+        groups["B 100"].append(("003", week_bitmap(["Wed"], 540, 600)))
+        report = check_feasibility(groups)
+        self.assertEqual(report["status"], "feasible")
+        self.assertEqual(report["example"][1], {"course": "B 100", "options": ["003"]})
+
+        report = check_feasibility({**groups, "D 100": [("001", None)]})
+        self.assertEqual((report["status"], report["unschedulable"]), ("infeasible", ["D 100"]))
+
+
+class CourseTimeMinutesTests(TestCase):
+    def test_save_keeps_the_minutes_in_step_with_the_name(self):
+        time_ = CourseTime.objects.create(name="9:30")
+        self.assertEqual(time_.minutes_since_midnight, 570)
+        time_.name = "13:05"
+        time_.save(update_fields=["name"])
+        self.assertEqual(CourseTime.objects.get(pk=time_.pk).minutes_since_midnight, 13 * 60 + 5)
+        self.assertIsNone(CourseTime.objects.create(name="TBA").minutes_since_midnight)
+
+    def test_backfill_fills_existing_rows(self):
+        migration = importlib.import_module("scheduler.migrations.0003_coursetime_minutes_since_midnight")
+        for name in ("9:00", "09:30", "17:50", "24:00", "TBA"):
+            CourseTime.objects.create(name=name)
+        CourseTime.objects.update(minutes_since_midnight=None)  # as before the column existed
+
+        migration.backfill_minutes(django_apps, None)
+        self.assertEqual(dict(CourseTime.objects.values_list("name", "minutes_since_midnight")),
+                         {"9:00": 540, "09:30": 570, "17:50": 1070, "24:00": None, "TBA": None})
+
+
+class DayMaskSyncTests(TestCase):
+    def setUp(self):
+        import_schedule(ScheduleImportTests.CSV)  # 001 meets Mon/Wed, 002 Tues/Thurs
+        self.first, self.second = Course.objects.order_by("section__name")
+        self.fri = CourseDay.objects.get(name="Fri")
+
+    def masks(self):
+        """ {section: (day_mask, search row day_mask)} once the refresh queued by the change has run """
+        return {c.section.name: (c.day_mask, c.search.day_mask)
+                for c in Course.objects.select_related("section", "search")}
+
+    def change(self, write):
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        return self.masks()
+
+    def test_forward_changes_update_the_course(self):
+        mon_wed = day_mask_for(["Mon", "Wed"])
+        masks = self.change(lambda: self.first.day.add(self.fri))
+        self.assertEqual(masks["001"], (day_mask_for(["Mon", "Wed", "Fri"]),) * 2)
+        masks = self.change(lambda: self.first.day.remove(self.fri))
+        self.assertEqual(masks["001"], (mon_wed, mon_wed))
+        masks = self.change(self.first.day.clear)
+        self.assertEqual(masks["001"], (0, 0))
+        self.assertEqual(masks["002"], (day_mask_for(["Tues", "Thurs"]),) * 2)
+
+    def test_reverse_changes_update_every_course(self):
+        masks = self.change(lambda: self.fri.courses.add(self.first, self.second))
+        self.assertEqual(masks, {"001": (day_mask_for(["Mon", "Wed", "Fri"]),) * 2,
+                                 "002": (day_mask_for(["Tues", "Thurs", "Fri"]),) * 2})
+        masks = self.change(lambda: self.fri.courses.remove(self.first))
+        self.assertEqual(masks["001"], (day_mask_for(["Mon", "Wed"]),) * 2)
+        masks = self.change(self.fri.courses.clear)
+        self.assertEqual(masks["002"], (day_mask_for(["Tues", "Thurs"]),) * 2)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        import_schedule(ScheduleImportTests.CSV)
+        self.client.force_login(User.objects.create_user("advisor"))
+        self.url, self.params = reverse("scheduler:view_courses"), {"year": "2025", "search": "1"}
+        self.client.get(self.url, self.params)  # sets the CSRF cookie, which is part of the ETag
+
+    def etag(self):
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_unchanged_data_is_answered_304_without_querying_it(self):
+        etag = self.etag()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if '"scheduler_' in q["sql"]])
+        self.assertNotIn("Last-Modified", response)
+
+    def test_a_committed_change_renders_again(self):
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_schedule_version()
+        self.assertEqual(self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_another_users_etag_is_not_reused(self):
+        etag = self.etag()
+        self.client.force_login(User.objects.create_user("other"))
+        self.assertEqual(self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # If-Modified-Since alone never answers 304: the date says nothing about whose page it was
+        response = self.client.get(self.url, self.params, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+
+    def test_pending_messages_are_rendered(self):
+        etag = self.etag()
+        storage = CookieStorage(HttpRequest())
+        storage.add(messages.SUCCESS, "Course saved.")
+        response = HttpResponse()
+        storage.update(response)
+        self.client.cookies.update(response.cookies)
+
+        response = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Course saved.")
+
+
+class ScheduleImportTests(TestCase):
+    CSV = (
+        "Course Code,Number,Section,Term,Academic Year,Days,Start Time,End Time\n"
+        "FNH,200,001,T1,2025,\"M, W\",9:00,09:50\n"
+        "FNH,200,002,T1,2025,Tues/Thurs,10:00,11:20\n"
+    )
+
+    def plan(self, text):
+        return plan_import(read_schedule(StringIO(text), "schedule.csv"))
+
+    def test_import_creates_lookups_courses_and_days(self):
+        plan = self.plan(self.CSV)
+        self.assertEqual((plan["create"], plan["errors"]), (2, {}))
+        self.assertEqual(plan["new_lookups"]["Time"], ["09:00", "09:50", "10:00", "11:20"])
+
+        apply_import(plan)
+        course = Course.objects.get(section__name="002")
+        self.assertEqual(course.slug, course.build_slug())
+        self.assertEqual(course.day_mask, day_mask_for(["Tues", "Thurs"]))
+        self.assertEqual(sorted(course.day.values_list("name", flat=True)), ["Thurs", "Tues"])
+        self.assertEqual(course.start_time.minutes_since_midnight, 600)
+
+        # the same rows again now clash with the stored courses
+        self.assertEqual(self.plan(self.CSV)["errors"], {2: ["Course already exists."], 3: ["Course already exists."]})
+
+    def test_import_reuses_stored_times_by_minutes(self):
+        nine = CourseTime.objects.create(name="9:00")  # entered by hand, without the leading zero
+        plan = self.plan(self.CSV)
+        self.assertEqual(plan["new_lookups"]["Time"], ["09:50", "10:00", "11:20"])
+
+        apply_import(plan)
+        self.assertEqual(Course.objects.get(section__name="001").start_time, nine)
+        self.assertEqual(CourseTime.objects.filter(minutes_since_midnight=540).count(), 1)
+
+    def test_rows_are_validated_together(self):
+        plan = self.plan(self.CSV + "FNH,200,001,T1,2025,Sun,10:00,9:00\n,1,1,T1,2025,,,\n")
+        self.assertEqual(plan["errors"], {
+            2: ["Duplicate of another row in the file."],
+            4: ["End time must be later than start time.", "Unknown day name.",
+                "Duplicate of another row in the file."],
+            5: ["Code is required."],
+        })
+        with self.assertRaises(ScheduleImportError):
+            apply_import(plan)
+        self.assertFalse(Course.objects.exists())
+
+    def test_sync_writes_only_changed_rows(self):
+        apply_import(self.plan(self.CSV + "FNH,300,001,T1,2025,Fri,13:00,14:00\n"))
+        kept = Course.objects.get(section__name="001", number__name="200")
+
+        def sync(text, **kwargs):
+            return plan_import(read_schedule(StringIO(text), "schedule.csv"), sync=True, **kwargs)
+
+        plan = sync(self.CSV + "FNH,300,001,T1,2025,Fri,13:00,14:00\n")
+        self.assertEqual((plan["create"], plan["update"], plan["unchanged"]), (0, 0, 3))
+        with self.assertNumQueries(0):
+            apply_import(plan)
+
+        changed = self.CSV.replace("Tues/Thurs,10:00", "Fri,10:30") + "FNH,400,001,T2,2025,Mon,8:00,9:00\n"
+        plan = sync(changed, delete_missing=True)
+        self.assertEqual((plan["create"], plan["update"], plan["unchanged"], plan["delete"]), (1, 1, 1, 1))
+        self.assertEqual(apply_import(plan), {"created": 1, "updated": 1, "deleted": 1})
+
+        moved = Course.objects.get(section__name="002")
+        self.assertEqual((moved.day_mask, moved.start_time.name), (day_mask_for(["Fri"]), "10:30"))
+        self.assertEqual(list(moved.day.values_list("name", flat=True)), ["Fri"])
+        self.assertFalse(Course.objects.filter(number__name="300").exists())
+        self.assertEqual(Course.objects.get(section__name="001", number__name="200").slug, kept.slug)
+
+    def test_export_round_trips_through_import(self):
+        apply_import(self.plan(self.CSV))
+        self.client.force_login(User.objects.create_user("exporter"))
+        response = self.client.get(reverse("scheduler:export_courses"), {"year": "2025", "day": "Tues"})
+        exported = b"".join(response.streaming_content).decode()
+        self.assertEqual(exported.splitlines(), [
+            "Course Code,Number,Section,Term,Academic Year,Days,Start Time,End Time",
+            "FNH,200,002,T1,2025,\"Tues, Thurs\",10:00,11:20",
+        ])
+        plan = plan_import(read_schedule(StringIO(exported), "export.csv"), sync=True)
+        self.assertEqual((plan["unchanged"], plan["errors"]), (1, {}))
+
+
+def import_schedule(text):
+    return apply_import(plan_import(read_schedule(StringIO(text), "schedule.csv")))
+
+
+class TimetableLayoutTests(TestCase):
+    def setUp(self):
+        import_schedule(ScheduleImportTests.CSV + "FNH,300,001,T1,2025,Mon,9:30,10:30\nFNH,300,001,T2,2025,Fri,,\n")
+        self.client.force_login(User.objects.create_user("planner"))
+        self.url = reverse("scheduler:timetable_layout")
+
+    def test_layout_lists_positioned_courses_and_the_unscheduled_ones(self):
+        layout = self.client.get(self.url, {"year": "2025", "term": ["T1", "T2"]}).json()
+        self.assertEqual(set(layout), {"hours", "courses", "invalid", "calendar_url"})
+        self.assertEqual(layout["hours"][:2], ["08", "09"])
+
+        courses = {f"{c['number']} {c['section']}": c for c in layout["courses"]}
+        self.assertEqual(set(courses), {"200 001", "200 002", "300 001"})
+        first = courses["200 001"]
+        self.assertEqual({k: first[k] for k in ("code", "term", "year", "start", "end", "hour", "top", "height")},
+                         {"code": "FNH", "term": "T1", "year": "2025", "start": "09:00", "end": "09:50",
+                          "hour": "09", "top": 0, "height": 50})
+        self.assertEqual(first["color"], CourseCode.objects.get().color)
+        self.assertEqual(first["days"], [["Mon", 100.0, 100, False], ["Wed", 100.0, 100, False]])
+        # 9:30-10:30 starts half way down the 09 row and is stacked over the Monday 9:00 course
+        self.assertEqual((courses["300 001"]["top"], courses["300 001"]["height"]), (30, 60))
+        self.assertEqual(courses["300 001"]["days"], [["Mon", 90.0, 101, True]])
+
+        self.assertEqual(layout["invalid"],
+                         [{"code": "FNH", "number": "300", "section": "001", "year": "2025", "term": "T2"}])
+
+    def test_layout_needs_a_year_and_a_term(self):
+        for params in ({"year": "2025"}, {"term": "T1"}, {}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {"error": "You have to select both Academic Year and Term."})
+
+
+class TimetableExportTests(TestCase):
+    def test_timetable_export_stacks_overlaps(self):
+        import_schedule(ScheduleImportTests.CSV + "FNH,300,001,T1,2025,Mon,9:30,10:30\nFNH,300,001,T2,2025,Fri,,\n")
+        self.client.force_login(User.objects.create_user("exporter"))
+        response = self.client.get(reverse("scheduler:export_timetable"), {"year": "2025", "term": ["T1", "T2"]})
+        wb = load_workbook(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(wb.sheetnames, ["T1", "T2", "Unscheduled"])
+
+        ws = wb["T1"]
+        # Mon has two columns (B, C): 9:00-9:50 at depth 0, 9:30-10:30 stacked beside it
+        self.assertEqual([ws["B1"].value, ws["D1"].value], ["Mon", "Tues"])
+        self.assertEqual((ws["A8"].value, ws["B8"].value), ("09:00", "FNH 200 001\n09:00-09:50"))
+        self.assertEqual(ws["C11"].value, "FNH 300 001\n09:30-10:30")
+        self.assertIn("C11:C16", {str(r) for r in ws.merged_cells.ranges})
+        self.assertEqual(ws["B8"].fill.start_color.rgb[-6:], CourseCode.objects.get().color[1:])
+        self.assertEqual(list(wb["Unscheduled"].values)[1], ("FNH", "300", "001", "T2", "2025"))
+
+
+@override_settings(TIMETABLE_TERM_DATES={"2025": {"T1": ("2025-09-02", "2025-12-05")}})
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        import_schedule(ScheduleImportTests.CSV)
+        self.user = User.objects.create_user("advisor")
+        self.client.force_login(self.user)
+        layout = self.client.get(reverse("scheduler:timetable_layout"), {"year": "2025", "term": "T1"}).json()
+        self.client.logout()
+        # calendar clients have no session; the signed URL carries the filters
+        self.url = layout["calendar_url"]
+
+    def test_calendar_feed_recurs_weekly_per_course_day(self):
+        feed = b"".join(self.client.get(self.url).streaming_content).decode()
+        events = feed.split("BEGIN:VEVENT")[1:]
+        self.assertEqual(len(events), 4)
+        self.assertIn("DTSTART;TZID=America/Vancouver:20250903T090000\r\n", events[1])  # the first Wednesday
+        self.assertIn("RRULE:FREQ=WEEKLY;UNTIL=20251206T075959Z\r\n", events[1])
+        self.assertIn("SUMMARY:FNH 200 001\r\n", events[1])
+        # the server runs in UTC; the times are Vancouver's and the feed says how Vancouver's offset moves
+        self.assertIn("BEGIN:VTIMEZONE\r\nTZID:America/Vancouver\r\n"
+                      "BEGIN:DAYLIGHT\r\nDTSTART:20250309T020000\r\nTZOFFSETFROM:-0800\r\nTZOFFSETTO:-0700\r\n"
+                      "TZNAME:PDT\r\nEND:DAYLIGHT\r\n"
+                      "BEGIN:STANDARD\r\nDTSTART:20251102T020000\r\nTZOFFSETFROM:-0700\r\nTZOFFSETTO:-0800\r\n"
+                      "TZNAME:PST\r\nEND:STANDARD\r\nEND:VTIMEZONE\r\n", feed)
+        self.assertEqual(self.client.get(self.url + "x").status_code, 404)
+        self.assertEqual(self.client.get(reverse("scheduler:timetable_calendar"), {"year": "2025"}).status_code, 302)
+
+    def test_repeat_fetch_is_served_from_the_cache(self):
+        with mock.patch("scheduler.views.calendar_lines", wraps=calendar_lines) as lines:
+            feed = b"".join(self.client.get(self.url).streaming_content).decode()
+            with self.assertNumQueries(4):  # the subscriber's account, then cache reads: the version (ETag, key), the body
+                self.assertEqual(self.client.get(self.url).content.decode(), feed)
+            self.assertEqual(lines.call_count, 1)
+
+            # a schedule change moves the version on, so the next fetch builds the feed again
+            with self.captureOnCommitCallbacks(execute=True):
+                Course.objects.get(section__name="001").save()
+            b"".join(self.client.get(self.url).streaming_content)
+            self.assertEqual(lines.call_count, 2)
+
+    def test_tokens_expire_and_end_with_the_account(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url.replace("feed=", "feed=x")).status_code, 404)
+        year_later = time.time() + 366 * 24 * 60 * 60
+        with mock.patch("django.core.signing.time.time", return_value=year_later):
+            self.assertEqual(self.client.get(self.url).status_code, 404)
+        with self.settings(TIMETABLE_CALENDAR_FEED_MAX_AGE=2 * 365 * 24 * 60 * 60), \
+                mock.patch("django.core.signing.time.time", return_value=year_later):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_cached_bodies_are_kept_per_host(self):
+        b"".join(self.client.get(self.url).streaming_content)
+        with self.settings(ALLOWED_HOSTS=["testserver", "other.example"]):
+            other = b"".join(self.client.get(self.url, HTTP_HOST="other.example").streaming_content)
+        self.assertIn(b"@other.example\r\n", other)
+        self.assertNotIn(b"@testserver", other)
+
+
+class FeasibilityCommandTests(TestCase):
+    def setUp(self):
+        import_schedule(ScheduleImportTests.CSV + "APBI,100,001,T1,2025,Mon,9:30,10:20\n")
+        self.program = Program.objects.create(name=ProgramName.objects.create(name="FNH"),
+                                              year_level=ProgramYearLevel.objects.create(name="1"))
+        self.program.courses.set(Course.objects.all())
+
+    def check(self, **options):
+        call_command("check_feasibility", year="2025", stdout=StringIO(), **options)
+        return FeasibilityReport.objects.get(program=self.program, term__name="T1")
+
+    def test_reports_are_stored_per_program_term(self):
+        report = self.check(workers=0)
+        self.assertEqual((report.status, report.course_count), ("feasible", 2))
+        # FNH 200 001 meets Mon 9:00-9:50 and clashes with APBI 100 001, so only 002 fits
+        self.assertEqual(report.example, [{"course": "APBI 100", "options": ["001"]},
+                                          {"course": "FNH 200", "options": ["002"]}])
+
+        Course.objects.get(section__name="002").delete()
+        report = self.check(workers=2)  # the same search in worker processes
+        self.assertEqual((report.status, report.conflicting_pairs), ("infeasible", [["APBI 100", "FNH 200"]]))
+        self.assertEqual(FeasibilityReport.objects.count(), 1)
+
+
+class ReslugTests(TestCase):
+    def test_renames_are_coalesced_and_written_in_bulk(self):
+        call_command("seed_schedule", courses=120, terms=["T1", "T2"], stdout=StringIO())
+        term = CourseTerm.objects.get(name="T1")
+        code = Course.objects.filter(term=term).select_related("code").first().code
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            term.name, code.name = "W1", "ZZZ"
+            term.save()
+            code.save()
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        # per renamed lookup one UPDATE of its search column, then one SELECT and one UPDATE for the slugs
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        self.assertEqual([" ".join(sql.split()[:2]) for sql in sqls if sql.startswith("UPDATE")],
+                         ['UPDATE "scheduler_coursesearch"'] * 2 + ['UPDATE "scheduler_course"'])
+        self.assertEqual(len([sql for sql in sqls if 'FROM "scheduler_course" ' in sql]), 1)
+
+        for course in Course.objects.filter(Q(term=term) | Q(code=code)).select_related(
+                "code", "number", "section", "academic_year", "term"):
+            self.assertEqual(course.slug, course.build_slug())
+        self.assertTrue(Course.objects.filter(slug__contains="-w1-").exists())
+
+    def test_rolled_back_changes_are_not_flushed(self):
+        call_command("seed_schedule", courses=60, stdout=StringIO())
+        term, code = CourseTerm.objects.get(name="T1"), CourseCode.objects.get(name="S0000")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                term.name = "W1"
+                term.save()
+                raise RuntimeError
+            code.name = "ZZZ"
+            code.save()
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        # only the code's rename is applied; the rolled-back term rename left nothing queued
+        self.assertEqual([" ".join(q["sql"].split()[:2]) for q in ctx.captured_queries
+                          if q["sql"].startswith("UPDATE")],
+                         ['UPDATE "scheduler_coursesearch"', 'UPDATE "scheduler_course"'])
+        self.assertFalse(Course.objects.filter(slug__contains="-w1-").exists())
+
+    def test_bulk_lookup_delete_drops_orphans_and_reslugs_the_rest(self):
+        call_command("seed_schedule", courses=120, terms=["T1", "T2"], stdout=StringIO())
+        number = CourseNumber.objects.get(name="100")
+        Course.objects.filter(number=number).update(code=None)  # only the number still identifies these
+        CourseCode.objects.filter(name="S0001").update(name="S&1 b")  # slugify changes more than the case
+        orphans = set(Course.objects.filter(number=number).values_list("id", flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseNumber.objects.filter(name="100").delete()
+            CourseTerm.objects.filter(name__in=["T1", "T2"]).delete()  # a bulk queryset delete
+
+        self.assertFalse(Course.objects.filter(id__in=orphans).exists())
+        self.assertEqual(Course.objects.count(), 120 - len(orphans))
+        for course in Course.objects.select_related("code", "number", "section", "academic_year", "term"):
+            self.assertEqual(course.slug, course.build_slug())
+
+    def test_lookup_delete_queues_its_courses_for_this_transaction_only(self):
+        call_command("seed_schedule", courses=60, terms=["T1", "T2"], stdout=StringIO())
+        section = CourseSection.objects.get(name="001")
+        survivors = set(Course.objects.filter(section=section).values_list("id", flat=True))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                CourseTerm.objects.get(name="T1").delete()
+                raise RuntimeError
+            section.delete()
+        batches = [c.args[0] for c in callbacks if getattr(c, "func", None) is flush_course_refresh]
+        self.assertEqual([b.reslug_ids for b in batches], [survivors])
+
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        self.assertFalse([q["sql"] for q in ctx.captured_queries if " LIKE " in q["sql"]])
+        for course in Course.objects.filter(id__in=survivors).select_related(
+                "code", "number", "section", "academic_year", "term"):
+            self.assertEqual(course.slug, course.build_slug())
+
+    def test_lookup_delete_costs_the_same_at_any_size(self):
+        def delete_term(courses, name):
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("seed_schedule", courses=courses, terms=[name], programs=0, history=0, stdout=StringIO())
+            with CaptureQueriesContext(connection) as ctx:
+                with self.captureOnCommitCallbacks(execute=True):
+                    CourseTerm.objects.get(name=name).delete()
+            return len(ctx.captured_queries)
+
+        self.assertEqual(delete_term(10, "T1"), delete_term(1000, "T2"))
+        # the survivors were reslugged in SQL, none still names the deleted term
+        self.assertFalse(Course.objects.filter(slug__contains="-t2-").exists())
+        course = Course.objects.select_related("code", "number", "section", "academic_year", "term").latest("id")
+        self.assertEqual(course.slug, course.build_slug())
+        self.assertTrue(course.slug.endswith(f"-none-{course.pk}"))
+
+
+class CourseSearchTests(TestCase):
+    def check(self, **options):
+        out = StringIO()
+        call_command("check_course_search", stdout=out, **options)
+        return out.getvalue()
+
+    def test_projection_follows_every_kind_of_write(self):
+        call_command("seed_schedule", courses=60, terms=["T1", "T2"], stdout=StringIO())
+        self.assertIn("0 missing and 0 stale", self.check())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseTerm.objects.filter(name="T1").update(name="T9")  # no signals: drift
+        self.assertRaises(CommandError, self.check)
+        self.assertIn("Repaired 30 search rows", self.check(repair=True))
+
+        course = Course.objects.order_by("pk").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            term = CourseTerm.objects.get(name="T2")
+            term.name = "W2"
+            term.save()
+            course.start_time.name = "07:00"
+            course.start_time.save()
+            course.day.set(CourseDay.objects.filter(name="Sat"))
+            CourseSection.objects.filter(name="002").delete()
+        self.assertIn("0 missing and 0 stale", self.check())
+        row = CourseSearch.objects.get(course=course)
+        self.assertEqual((row.start_minutes, row.day_mask), (7 * 60, 0))
+        self.assertFalse(CourseSearch.objects.filter(term="T2").exists())
+        self.assertEqual(CourseSearch.objects.filter(section="").count(), 20)
+
+        course.delete()
+        self.assertFalse(CourseSearch.objects.filter(course_id=course.pk).exists())
+
+
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        call_command("seed_schedule", courses=60, years=["2024", "2025"], stdout=StringIO())
+        self.client.force_login(User.objects.create_user("advisor"))
+        self.url = reverse("scheduler:course_typeahead")
+        course_index.clear()
+
+    def search_queries(self, q):
+        with CaptureQueriesContext(connection) as ctx:
+            results = self.client.get(self.url, {"q": q}).json()["results"]
+        return results, [q["sql"] for q in ctx.captured_queries if "scheduler_course" in q["sql"]]
+
+    def test_typeahead_serves_prefixes_from_the_index(self):
+        labels = [r["label"] for r in self.client.get(self.url, {"q": " s0000  10", "limit": 5}).json()["results"]]
+        self.assertEqual(labels, ["S0000 100 001", "S0000 100 002", "S0000 100 003",
+                                  "S0000 101 001", "S0000 101 002"])  # one entry per section across both years
+        _, queries = self.search_queries("S0000 101")  # session and version reads only
+        self.assertEqual(queries, [])
+
+    def test_index_is_rebuilt_once_after_the_schedule_changes(self):
+        self.search_queries("S0000")
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseSection.objects.filter(name="001").update(name="000")
+            call_command("rebuild_course_search", stdout=StringIO())  # bumps the version
+
+        results, queries = self.search_queries("S0000 100")
+        self.assertEqual(results[0], {"label": "S0000 100 000", "code": "S0000", "number": "100", "section": "000"})
+        self.assertEqual(len(queries), 1)
+        self.assertIn("DISTINCT", queries[0])
+        self.assertEqual(self.search_queries("S0000 101")[1], [])
+
+
+class LookupCacheTests(TestCase):
+    def test_form_choices_are_cached_per_table_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("seed_schedule", courses=30, stdout=StringIO())
+        self.client.force_login(User.objects.create_user("editor"))
+        url = reverse("scheduler:create_course")
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertFalse([q for q in ctx.captured_queries if '"scheduler_course' in q["sql"]])
+
+        # a course edit leaves the lookups cached, a rename reloads only its own table
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.first().save()
+            CourseTerm.objects.filter(name="T1").update(name="W1")  # no signals: still cached
+            CourseSection.objects.get(name="001").save()
+        with CaptureQueriesContext(connection) as ctx:
+            content = self.client.get(url).content.decode()
+        self.assertEqual([q["sql"].split('FROM "')[1].split('"')[0] for q in ctx.captured_queries
+                          if '"scheduler_course' in q["sql"]], ["scheduler_coursesection"])
+        self.assertIn(">T1<", content)
+
+    def test_pages_read_no_lookup_table_twice(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("seed_schedule", courses=30, stdout=StringIO())
+        self.client.force_login(User.objects.create_user("advisor"))
+        for url in (reverse("scheduler:landing_page"), reverse("scheduler:requirements")):
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(url)
+            lookups = ("programyearlevel", "programname", "courseterm", "coursenumber", "coursesection",
+                       "coursetime", "courseday", "coursecode", "courseyear")
+            self.assertFalse([q["sql"] for q in ctx.captured_queries
+                              if any(f'FROM "scheduler_{table}"' in q["sql"] for table in lookups)], url)
+
+
+class CoursePaginationTests(TestCase):
+    def test_cursors_walk_every_course_once_in_order(self):
+        call_command("seed_schedule", courses=95, terms=["T1", "T2"], stdout=StringIO())
+        Course.objects.filter(pk__in=Course.objects.order_by("pk").values("pk")[:5]).update(section=None)
+        call_command("rebuild_course_search", stdout=StringIO())  # update() bypasses the signals
+        courses = Course.objects.filter(academic_year__name="2025")
+        expected = sorted(courses.select_related("code", "number", "section", "academic_year", "term"), key=lambda c: (
+            c.code.name, c.number.name, c.section.name if c.section else "", c.academic_year.name, c.term.name, c.pk))
+
+        pages, cursor = [], None
+        while True:
+            with self.assertNumQueries(1):
+                page = keyset_page(courses, cursor, per_page=20)
+            pages.append(page)
+            if not page["has_next"]:
+                break
+            cursor = page["next_cursor"]
+        self.assertEqual([c.pk for p in pages for c in p["object_list"]], [c.pk for c in expected])
+
+        # the seek is bounded on the leading sort column, so an index range scan can start at the cursor
+        with CaptureQueriesContext(connection) as ctx:
+            keyset_page(courses, pages[1]["next_cursor"], per_page=20)
+        self.assertIn('"scheduler_coursesearch"."code" >= ', ctx.captured_queries[0]["sql"])
+
+        # back from the last page, and a tampered cursor starts over
+        back = keyset_page(courses, pages[-1]["prev_cursor"], per_page=20)
+        self.assertEqual([c.pk for c in back["object_list"]], [c.pk for c in pages[-2]["object_list"]])
+        self.assertFalse(keyset_page(courses, cursor[:-2] + "xx", per_page=20)["has_previous"])
+
+    def test_view_counts_matches_only_on_request(self):
+        call_command("seed_schedule", courses=45, terms=["T1"], stdout=StringIO())
+        self.client.force_login(User.objects.create_user("viewer"))
+        url = reverse("scheduler:view_courses")
+        params = {"year": "2025", "search": "1"}
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertIsNone(response.context["total"])
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"] and "scheduler_course" in q["sql"]])
+        self.assertContains(response, "count=1")
+
+        cursor = response.context["page"]["next_cursor"]
+        self.assertEqual(self.client.get(url, {**params, "cursor": cursor, "count": "1"}).context["total"], 45)
+        self.assertEqual(self.client.get(url, params).context["total"], 45)  # cached for the data version
+
+
+def _pk_of(model, **filters):
+    return lambda: [model.objects.filter(**filters).order_by("pk")[0].pk]
+
+
+TIMETABLE_PARAMS = {"year": "2025", "term": ["T1", "T2"], "search": "1"}
+
+
+class SchedulerQueryBudgetTests(QueryBudgetMixin, TestCase):
+    namespace = "scheduler"
+    cases = {
+        "landing_page": ("get", [], {**TIMETABLE_PARAMS, "pname": "Budget Program", "plevel": "1"}),
+        "timetable_layout": ("get", [], TIMETABLE_PARAMS),
+        "export_timetable": ("get", [], TIMETABLE_PARAMS),
+        "timetable_calendar": ("get", [], TIMETABLE_PARAMS),
+        "view_courses": ("get", [], {"year": "2025", "day": ["Mon", "Fri"], "search": "1"}),
+        "export_courses": ("get", [], {"year": "2025", "day": ["Mon", "Fri"], "format": "xlsx"}),
+        "create_course": ("get", [], {}),
+        "import_courses": ("get", [], {}),
+        "edit_course": ("get", _pk_of(Course), {}),
+        "delete_course": ("get", _pk_of(Course), {}),
+        "suggest_slots": ("get", _pk_of(Course), {}),
+        "ajax_terms_for_year": ("get", [], {"year": "2025"}),
+        "course_term": ("get", [], {}),
+        "course_term_affected": ("get", _pk_of(CourseTerm, name="T1"), {}),
+        "course_code": ("get", [], {}),
+        "course_code_affected": ("get", _pk_of(CourseCode, name="S0000"), {}),
+        "course_number": ("get", [], {}),
+        "course_number_affected": ("get", _pk_of(CourseNumber, name="100"), {}),
+        "course_section": ("get", [], {}),
+        "course_section_affected": ("get", _pk_of(CourseSection, name="001"), {}),
+        "course_time": ("get", [], {}),
+        "course_time_affected": ("get", _pk_of(CourseTime, start_time__isnull=False), {}),
+        "course_year": ("get", [], {}),
+        "course_year_affected": ("get", _pk_of(CourseYear, name="2025"), {}),
+        "program_name": ("get", [], {}),
+        "program_name_affected": ("get", _pk_of(ProgramName, name="Budget Program"), {}),
+        "requirements": ("get", [], {"program": "Budget Program", "level": "1", "search": "1"}),
+        "ajax_levels_for_program": ("get", [], {"program": "Budget Program"}),
+        "ajax_numbers_for_code": ("get", [], {"code": "S0000"}),
+        "course_typeahead": ("get", [], {"q": "S00"}),
+        "requirements_combinations": ("get", [], {"program": "Budget Program", "level": "1",
+                                                  "year": "2025", "term": "T1", "limit": "5"}),
+        "history": ("post", [], {"name": "course_term"}),
+    }
+    # writes: renames and deletes of lookups used by a share of courses that grows with the data
+    cases.update({
+        "course_term_create": ("post", [], {"name": "W9"}),
+        "course_term_update": ("post", _pk_of(CourseTerm, name="T1"), {"name": "W1"}),
+        "course_term_delete": ("post", _pk_of(CourseTerm, name="T1"), {}),
+        "course_code_create": ("post", [], {"name": "ZZZ", "color": "#010203"}),
+        "course_code_update": ("post", _pk_of(CourseCode, name="S0000"), {"name": "ZZZ", "color": "#010203"}),
+        "course_code_delete": ("post", _pk_of(CourseCode, name="S0000"), {}),
+        "course_number_create": ("post", [], {"name": "999"}),
+        "course_number_update": ("post", _pk_of(CourseNumber, name="100"), {"name": "999"}),
+        "course_number_delete": ("post", _pk_of(CourseNumber, name="100"), {}),
+        "course_section_create": ("post", [], {"name": "999"}),
+        "course_section_update": ("post", _pk_of(CourseSection, name="001"), {"name": "999"}),
+        "course_section_delete": ("post", _pk_of(CourseSection, name="001"), {}),
+        "course_time_create": ("post", [], {"name": "23:55"}),
+        "course_time_update": ("post", _pk_of(CourseTime, start_time__isnull=False), {"name": "23:55"}),
+        "course_time_delete": ("post", _pk_of(CourseTime, start_time__isnull=False), {}),
+        "course_year_create": ("post", [], {"name": "2099"}),
+        "course_year_update": ("post", _pk_of(CourseYear, name="2025"), {"name": "2099"}),
+        "course_year_delete": ("post", _pk_of(CourseYear, name="2025"), {}),
+        "program_name_create": ("post", [], {"name": "New Program"}),
+        "program_name_update": ("post", _pk_of(ProgramName, name="Budget Program"), {"name": "Renamed Program"}),
+        "program_name_delete": ("post", _pk_of(ProgramName, name="Budget Program"), {}),
+        "requirements_detach_course": ("post", [], {"program_name": "Budget Program", "level_name": "1",
+                                                    "code_name": "S0000", "number_name": "100"}),
+        "requirements_attach_course": ("post", [], {"program_name": "Budget Program", "level_name": "1",
+                                                    "code_name": "S0000", "number_name": "100"}),
+    })
@@ -0,0 +1,67 @@
+'''
+Per-process prefix index for the course typeahead.
+
+Every distinct "CODE NUMBER SECTION" of any year is kept as one sorted list of
+normalized keys. A lookup bisects to the first key at or after the prefix and walks
+forward while keys still match, so it costs O(log n + limit) whatever the number of
+years loaded, and no query runs per keystroke.
+
+The index remembers the schedule data version it was built from. The first lookup
+after the version moves on rebuilds it from CourseSearch in one DISTINCT query;
+concurrent lookups wait for that build instead of starting their own.
+'''
+import bisect
+import threading
+
+from .caching import schedule_version
+from .models import CourseSearch
+
+TYPEAHEAD_LIMIT = 20
+
+
+def normalize(text):
+    """ upper case, single spaces: "  apbi   2" -> "APBI 2" """
+    return " ".join(text.upper().split())
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._version = None
+        self._keys = []      # sorted normalized labels
+        self._entries = []   # (code, number, section), parallel to _keys
+        self._lock = threading.Lock()
+
+    def _build(self):
+        triples = (CourseSearch.objects.exclude(code="")
+                   .values_list("code", "number", "section").distinct())
+        rows = sorted((normalize(" ".join(filter(None, t))), t) for t in triples)
+        return [key for key, _ in rows], [t for _, t in rows]
+
+    def _snapshot(self, version):
+        with self._lock:
+            if version != self._version:
+                self._keys, self._entries = self._build()
+                self._version = version
+            return self._keys, self._entries
+
+    def search(self, prefix, limit=TYPEAHEAD_LIMIT, version=None):
+        """ up to `limit` (code, number, section) whose label starts with `prefix`, in label order """
+        keys, entries = self._snapshot(schedule_version() if version is None else version)
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(keys, prefix)
+        results = []
+        for i in range(start, min(start + limit, len(keys))):
+            if not keys[i].startswith(prefix):
+                break
+            results.append(entries[i])
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._keys, self._entries = [], []
+
+
+course_index = PrefixIndex()
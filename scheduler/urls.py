@@ -6,10 +6,17 @@ app_name = 'scheduler'
 urlpatterns = [
     path('', views.landing_page, name='landing_page'),
     path('view_courses/', views.view_courses, name='view_courses'),
+    path('view_courses/export/', views.export_courses, name='export_courses'),
+    path('view_courses/typeahead/', views.course_typeahead, name='course_typeahead'),
     path('update/<int:course_id>/', views.edit_course, name='edit_course'),
     path('create_course/', views.create_course, name='create_course'),
     path("delete/<int:course_id>/", views.delete_course, name="delete_course"),
+    path("import/", views.import_courses, name="import_courses"),
     path("terms-for-year/", views.ajax_terms_for_year, name="ajax_terms_for_year"),
+    path("layout/", views.timetable_layout, name="timetable_layout"),
+    path("layout/export/", views.export_timetable, name="export_timetable"),
+    path("calendar.ics", views.timetable_calendar, name="timetable_calendar"),
+    path("suggest/<int:course_id>/", views.suggest_slots, name="suggest_slots"),
     
     # settings – course term
     path('setting_course_term/',    views.course_term_list,    name='course_term'),
@@ -66,6 +73,7 @@ urlpatterns = [
     path("requirements/detach/", views.requirements_detach_course, name="requirements_detach_course"),
     path("requirements/numbers/", views.ajax_numbers_for_code,   name="ajax_numbers_for_code"),
     path("requirements/attach/",  views.requirements_attach_course, name="requirements_attach_course"),
+    path("requirements/combinations/", views.requirements_combinations, name="requirements_combinations"),
     
     path("settings/history/", views.history, name="history"),  
 ] 
\ No newline at end of file
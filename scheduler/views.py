@@ -1,10 +1,8 @@
 from django.shortcuts import render
 from .models import CourseTerm, CourseCode, CourseNumber, CourseSection, CourseTime, CourseDay, Course, CourseYear, ProgramName
-from datetime import datetime, timedelta
 from django.shortcuts import redirect
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, F
 from .forms import CourseForm
 from django.shortcuts import get_object_or_404
 from django.views.decorators.http import require_POST
@@ -17,15 +15,34 @@ from .forms import CourseYearForm
 from .models import Program, ProgramYearLevel
 from .forms import ProgramNameForm
 from django.urls import reverse
-from django.http import JsonResponse
+from django.http import (JsonResponse, StreamingHttpResponse, FileResponse, HttpResponse,
+                         HttpResponseBadRequest, Http404, QueryDict)
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from functools import wraps
+from urllib.parse import urlencode
+import hashlib
 from django.db.models import Min
 from django.views.decorators.http import require_GET
 import json
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import cache_control
 from .models import HistoryLog, HistoryTopic, HistoryAction
+from .models import day_mask_for, day_names_for
 from django.utils import timezone
 from zoneinfo import ZoneInfo
+from .layout import layout_courses, build_grid, entry_depth
+from .caching import schedule_version, layout_cache, layout_cache_key, schedule_condition, cached_stream, lookup_cache
+from .ical import calendar_lines
+from .conflicts import course_bitmap, week_bitmap, day_patterns, rank_placements, find_combinations
+from .importer import ScheduleImportError, read_schedule, plan_import, preview_rows, apply_import
+from .exporter import export_rows, stream_csv, write_xlsx, write_timetable_xlsx
+from .pagination import keyset_page
+from .typeahead import TYPEAHEAD_LIMIT, course_index
+import time
 
 
 '''
@@ -34,12 +51,12 @@ VIEWS WORK FLOW:
 1. Grab all variables from database
 2. Grab all filters inputted by user from Landing Page
 3. Filter the courses based on the filters
-4. Create a slots dictionary with all time slots for each day split up into 1 minute intervals
-    - This will represent the time slots in the timetable to find conflicting courses/overlaps
-5. Iterate through all courses to find their start/end time and add courses to their corresponding time slots in the slots dictionary
-6. If a slot has > 1 course in it, calculate the overlap width, offset left for each course in that slot
-7. Create a dictionary (day_data) for each course that has its overlap info for each day
-8. Render the landing page with the courses and their overlap data
+4. Turn every valid course into an integer minute interval (start, end) on each of its days
+5. Pass the intervals to the layout engine (scheduler/layout.py), which sweeps each day in start order
+    - a course's overlap depth is the number of earlier courses still running when it starts
+6. Each overlap shrinks the course card width by 10% and raises its z-index
+7. Attach the per-day overlap data (day_data) to each course and bucket the courses into (hour, day) grid cells
+8. Render the landing page from the grid, so the template only walks real placements
 '''
 
 
@@ -47,15 +64,139 @@ VIEWS WORK FLOW:
 ''' This constant defines how many pixels each minute of course duration will take up in the timetable view.'''
 PIXELS_PER_MINUTE = 1
 
-# helper: sort the array in the order of "Mon, Tues, Wed, Thurs, Fri"
+# signing salt of the calendar subscription tokens (calendar_feed_url), and how long a token is
+# honoured unless TIMETABLE_CALENDAR_FEED_MAX_AGE says otherwise (seconds)
+CALENDAR_FEED_SALT = "scheduler.calendar"
+CALENDAR_FEED_MAX_AGE = 365 * 24 * 60 * 60
+
+# requirements_combinations: default and maximum result count and search time per request
+COMBINATION_LIMIT, COMBINATION_LIMIT_MAX = 20, 200
+COMBINATION_BUDGET_MS, COMBINATION_BUDGET_MS_MAX = 2000, 10000
+
+# rows of the timetable grid; a course is drawn in the row of its start hour
+HOUR_LIST = ["08","09","10","11","12","13","14","15","16","17","18","19","20","21"]
+
+# helper: the course's days in the order of "Mon, Tues, Wed, Thurs, Fri", read from day_mask (no query)
 def expand_days(course):
-    parts = [d.name for d in course.day.all()]
-    order = ["Mon", "Tues", "Wed", "Thurs", "Fri"]
-    return sorted(parts, key=lambda d: order.index(d))
+    return day_names_for(course.day_mask)
+
+# helper: read the timetable filters (year, terms, course lines, program) from a GET querydict
+def timetable_filters(params):
+    course_filters_json = params.get("course_filters_json", "").strip()
+    course_filters = []
+    if course_filters_json:
+        try:
+            data = json.loads(course_filters_json)
+            # keep only sane items: {"code": str, "numbers": [str, ...]}
+            for item in (data if isinstance(data, list) else []):
+                code = (item.get("code") or "").strip()
+                nums = [str(x).strip() for x in (item.get("numbers") or []) if str(x).strip()]
+                if code or nums:
+                    course_filters.append({"code": code, "numbers": nums})
+        except Exception:
+            course_filters = []
+
+    return {
+        "year": params.get("year", "").strip(),
+        "terms": params.getlist("term"),  # multi-select
+        "pname": params.get("pname", "").strip(),
+        "plevel": params.get("plevel", "").strip(),
+        "course_filters_json": course_filters_json,
+        "course_filters": course_filters,
+    }
+
+# helper: courses matching the timetable filters (year and terms must be set)
+def timetable_queryset(filters):
+    # base queryset (days come from Course.day_mask, no prefetch needed)
+    base_qs = (
+        Course.objects
+        .select_related("code", "number", "section", "term", "academic_year", "start_time", "end_time")
+        .filter(search__academic_year=filters["year"],
+                search__term__in=filters["terms"])
+        .order_by("search__code", "search__number", "search__section", "search__academic_year", "search__term")
+    )
+
+    # BY Course
+    if filters["course_filters"]:
+        or_q = Q()
+        for f in filters["course_filters"]:
+            code = f.get("code", "")
+            nums = f.get("numbers", [])
+            if not code and not nums:
+                continue
+            if code and nums:
+                or_q |= Q(search__code=code, search__number__in=nums)
+            elif code:
+                or_q |= Q(search__code=code)
+        if or_q:
+            base_qs = base_qs.filter(or_q)
+
+    # By Program
+    selected_pname, selected_plevel = filters["pname"], filters["plevel"]
+    if selected_pname and not selected_plevel:
+        base_qs = base_qs.filter(programs__name__name=selected_pname)
+    elif selected_pname and selected_plevel:
+        base_qs = base_qs.filter(programs__name__name=selected_pname,
+                                  programs__year_level__name=selected_plevel)
+    return base_qs
+
+# helper: A course is valid only if it has at least one day AND both times AND 5 things
+def split_valid_courses(all_courses):
+    courses, invalid_courses = [], []
+    for c in all_courses:
+        has_times = (c.start_time is not None and c.end_time is not None
+                     and c.start_time.minutes_since_midnight is not None
+                     and c.end_time.minutes_since_midnight is not None)
+        has_days  = c.day_mask != 0
+        has_5_things_on_slug = (c.code is not None and c.number is not None and c.section is not None and c.academic_year is not None and c.term is not None)
+        if has_times and has_days and has_5_things_on_slug:
+            courses.append(c)
+        else:
+            invalid_courses.append(c)
+    return courses, invalid_courses
+
+# helper: the laid-out timetable for a filter set, served from the layout cache while schedule data is unchanged
+def computed_timetable(filters):
+    # read the version before querying, so a concurrent change can only make this entry stale, never mislabelled
+    version = schedule_version()
+    key = layout_cache_key(filters)
+    result = layout_cache.get(key, version)
+    if result is None:
+        courses, invalid_courses = split_valid_courses(timetable_queryset(filters))
+        result = {
+            "courses": courses,
+            "invalid_courses": invalid_courses,
+            "grid": timetable_grid(courses),
+        }
+        layout_cache.set(key, version, result)
+    return result
+
+# helper: lay out valid courses and bucket them into (hour, day) cells for the timetable grid
+def timetable_grid(courses):
+    placements = layout_courses(
+        (c.id, expand_days(c), c.start_time.minutes_since_midnight, c.end_time.minutes_since_midnight)
+        for c in courses
+    )
+
+    # visual props (height, offset) and per-day overlap data
+    for c in courses:
+        placement = placements[c.id]
+        c.duration_minutes = placement["duration"]
+        c.pixel_height = c.duration_minutes * PIXELS_PER_MINUTE
+        c.offset_top = placement["offset_top"] * PIXELS_PER_MINUTE
+        c.day_names = expand_days(c)
+        c.day_data = placement["day_data"]
+
+    return build_grid(HOUR_LIST, (
+        (f"{c.start_time.minutes_since_midnight // 60:02d}", d, {"course": c, "data": c.day_data[d]})
+        for c in courses
+        for d in c.day_names
+    ))
 
 # --- AJAX: terms available for a given academic year ---
-@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@cache_control(private=True, no_cache=True)
 @login_required(login_url='accounts:ldap_login')
+@schedule_condition
 @require_GET
 def ajax_terms_for_year(request):
     year = request.GET.get("year", "").strip()  # e.g., "2025"
@@ -71,44 +212,30 @@ def ajax_terms_for_year(request):
     return JsonResponse({"terms": list(terms)})
 
 '''This function handles the landing page of the timetable application.'''
-@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@cache_control(private=True, no_cache=True)
 @login_required(login_url='accounts:ldap_login')
+@schedule_condition
 def landing_page(request):
     if not request.user.is_authenticated:
         return redirect('accounts:ldap_login')
 
-    hour_list = ["08","09","10","11","12","13","14","15","16","17","18","19","20","21"]
-    terms   = CourseTerm.objects.all()
-    codes   = CourseCode.objects.all()
-    numbers = CourseNumber.objects.all()
-    sections= CourseSection.objects.all()
-    times   = CourseTime.objects.all()
-    days    = CourseDay.objects.all()
+    # the lookup dropdowns come from the per-table versioned cache, not a query per request
+    codes = lookup_cache.rows(CourseCode.objects.all())
 
     # Academic Year
-    all_years = CourseYear.objects.values_list("name", flat=True)
+    all_years = [y.name for y in lookup_cache.rows(CourseYear.objects.all())]
     dropdown_years = sorted({y for y in all_years})
 
     # For the Name dropdown (once terms are chosen)
-    program_names = ProgramName.objects.order_by("name")
+    program_names = lookup_cache.rows(ProgramName.objects.order_by("name"))
 
-    selected_year  = request.GET.get("year", "").strip()
-    selected_terms = request.GET.getlist("term") # multi-select
-    selected_pname = request.GET.get("pname", "").strip()
-    selected_plevel = request.GET.get("plevel", "").strip()
-    course_filters_json = request.GET.get("course_filters_json", "").strip()
-    course_filters = []
-    if course_filters_json:
-        try:
-            data = json.loads(course_filters_json)
-            # keep only sane items: {"code": str, "numbers": [str, ...]}
-            for item in (data if isinstance(data, list) else []):
-                code = (item.get("code") or "").strip()
-                nums = [str(x).strip() for x in (item.get("numbers") or []) if str(x).strip()]
-                if code or nums:
-                    course_filters.append({"code": code, "numbers": nums})
-        except Exception:
-            course_filters = []
+    filters = timetable_filters(request.GET)
+    selected_year  = filters["year"]
+    selected_terms = filters["terms"]
+    selected_pname = filters["pname"]
+    selected_plevel = filters["plevel"]
+    course_filters_json = filters["course_filters_json"]
+    course_filters = filters["course_filters"]
 
     submitted      = ("search" in request.GET)
 
@@ -152,164 +279,27 @@ def landing_page(request):
 
     # Output collections
     courses = []          # timetable "occurrences"
+    calendar_url = ""     # .ics subscription for the current filters
     invalid_courses = []  # Course rows missing day/time/5 things on slug
-    all_courses = []      # all_courses = courses + invalid_courses
+    # only real placements reach the template: (hour, day) -> positioned cards
+    grid = timetable_grid(courses)
 
     if submitted:
         if not selected_year or not selected_terms:
             messages.error(request, "You have to select both Academic Year and Term.")
         else:
-            # NOTE: with M2M you must prefetch 'day'
-            # base queryset
-            base_qs = (
-                Course.objects
-                .select_related("code", "number", "section", "term", "academic_year", "start_time", "end_time")
-                .prefetch_related("day")
-                .filter(academic_year__name=selected_year,
-                        term__name__in=selected_terms)
-                .order_by("code__name", "number__name", "section__name", "academic_year__name", "term__name")
-            )
-
-            # BY Course
-            if course_filters:
-                or_q = Q()
-                for f in course_filters:
-                    code = f.get("code", "")
-                    nums = f.get("numbers", [])
-                    if not code and not nums:
-                        continue
-                    if code and nums:
-                        or_q |= Q(code__name=code, number__name__in=nums)
-                    elif code:
-                        or_q |= Q(code__name=code)
-                if or_q:
-                    base_qs = base_qs.filter(or_q)
-
-            # By Program
-            if selected_pname and not selected_plevel:
-                base_qs = base_qs.filter(programs__name__name=selected_pname)
-            elif selected_pname and selected_plevel:
-                base_qs = base_qs.filter(programs__name__name=selected_pname,
-                                          programs__year_level__name=selected_plevel)
-            all_courses = base_qs
-
-        # A course is valid only if it has at least one day AND both times AND 5 things
-        courses = []
-        for c in all_courses:
-            has_times = (c.start_time is not None and c.end_time is not None)
-            has_days  = c.day.exists()
-            has_5_things_on_slug = (c.code is not None and c.number is not None and c.section is not None and c.academic_year is not None and c.term is not None)
-            if has_times and has_days and has_5_things_on_slug:
-                courses.append(c)
-            else:
-                invalid_courses.append(c)
-    
-    if courses:
-        # build time grid
-        DAYS = ['Mon', 'Tues', 'Wed', 'Thurs', 'Fri']
-        START_TIME = '08:00'
-        END_TIME   = '21:00'
-        INTERVAL   = timedelta(minutes=1)
-        start_dt   = datetime.strptime(START_TIME, "%H:%M")
-        end_dt     = datetime.strptime(END_TIME, "%H:%M")
-
-        slots = {}
-        cur = start_dt
-        while cur < end_dt:
-            tstr = cur.strftime("%H:%M")
-            for d in DAYS:
-                slots[(d, tstr)] = []
-            cur += INTERVAL
-        
-        # place courses into slots
-        for course in courses:
-            attached_days = expand_days(course)
-            start_str = course.start_time.name[:5]
-            end_str   = course.end_time.name[:5]
-            cur = datetime.strptime(start_str, "%H:%M")
-            end = datetime.strptime(end_str, "%H:%M")
-
-            for d in attached_days:
-                cur_time = cur
-                while cur_time < end:
-                    t = cur_time.strftime("%H:%M")
-                    if (d, t) in slots:
-                        slots[(d, t)].append(course)
-                    cur_time += INTERVAL
-        
-        # compute overlaps
-        # helper: turn "HH:MM" into minutes since midnight
-        def _mins(hhmm: str) -> int:
-            hh, mm = map(int, hhmm.split(":"))
-            return hh * 60 + mm
-        
-        # Build day -> courses (sorted by start_time then id for stability)
-        day_to_courses = {"Mon": [], "Tues": [], "Wed": [], "Thurs": [], "Fri": []}
-        for c in courses:
-            for d in expand_days(c):
-                day_to_courses[d].append(c)
-        
-        for d in day_to_courses:
-            # sort by start minutes first, then by id for a stable "older → newer" order
-            day_to_courses[d].sort(key=lambda c: (_mins(c.start_time.name[:5]), c.id))
-
-        # Chain widths: for each day list, walk in order and shrink width 10% each time
-        for day_key, day_list in day_to_courses.items():
-            # keep a list of active courses that cover the current start time
-            # but we only care about predecessors that cover *this* course's start
-            for idx, c in enumerate(day_list):
-                c_start = _mins(c.start_time.name[:5])
-                c_end   = _mins(c.end_time.name[:5])
-
-                # count predecessors whose interval covers c_start
-                predecessors = 0
-                for prev in day_list[:idx]:
-                    p_start = _mins(prev.start_time.name[:5])
-                    p_end   = _mins(prev.end_time.name[:5])
-                    if p_start <= c_start < p_end:
-                        predecessors += 1
-
-                k = predecessors
-                width_pct = round(100.0 * (0.9 ** k), 2)
-                overlaps  = (k > 0)
-
-                # stash per-day values the same way your template already expects
-                setattr(c, f"{day_key}_overlap_width", width_pct)
-                setattr(c, f"{day_key}_overlaps", overlaps)
-                # Optional: z-index so a later (smaller) card sits on top
-                setattr(c, f"{day_key}_zindex", 100 + k)
-
-        # visual props (height, offset, color)
-        for c in courses:
-            start = datetime.strptime(c.start_time.name[:5], "%H:%M")
-            end   = datetime.strptime(c.end_time.name[:5], "%H:%M")
-            c.duration_minutes = (end - start).seconds // 60
-            c.pixel_height = c.duration_minutes * PIXELS_PER_MINUTE
-            c.offset_top = (start.minute) * PIXELS_PER_MINUTE
-            c.day_names = expand_days(c)
-
-        # per-day overlap data used by template
-        for c in courses:
-            c.day_data = {
-                "Mon":   {"overlap": getattr(c, 'Mon_overlaps',   None), "width": getattr(c, 'Mon_overlap_width',   None), "left": getattr(c, 'Mon_offset_left',   None), "z": getattr(c, 'Mon_zindex',   None)},
-                "Tues":  {"overlap": getattr(c, 'Tues_overlaps',  None), "width": getattr(c, 'Tues_overlap_width',  None), "left": getattr(c, 'Tues_offset_left',  None), "z": getattr(c, 'Tues_zindex',  None)},
-                "Wed":   {"overlap": getattr(c, 'Wed_overlaps',   None), "width": getattr(c, 'Wed_overlap_width',   None), "left": getattr(c, 'Wed_offset_left',   None), "z": getattr(c, 'Wed_zindex',   None)},
-                "Thurs": {"overlap": getattr(c, 'Thurs_overlaps', None), "width": getattr(c, 'Thurs_overlap_width', None), "left": getattr(c, 'Thurs_offset_left', None), "z": getattr(c, 'Thurs_zindex', None)},
-                "Fri":   {"overlap": getattr(c, 'Fri_overlaps',   None), "width": getattr(c, 'Fri_overlap_width',   None), "left": getattr(c, 'Fri_offset_left',   None), "z": getattr(c, 'Fri_zindex',   None)},
-            }
+            timetable = computed_timetable(filters)
+            courses = timetable["courses"]
+            invalid_courses = timetable["invalid_courses"]
+            grid = timetable["grid"]
+            calendar_url = calendar_feed_url(request, filters)
 
     # render
     return render(request, 'timetable/landing_page.html', {
-        'hour_list': hour_list,
-        'terms': terms,
+        'grid': grid,
         'codes': codes,
-        'numbers': numbers,
-        'sections': sections,
-        'times': times,
-        'days': days,
         'courses': courses,
         'invalid_courses': invalid_courses,
-        'day_list': ['Mon','Tues','Wed','Thurs','Fri'],
         'submitted': submitted,
         'dropdown_years': dropdown_years,
         'selected_year': selected_year,
@@ -321,6 +311,225 @@ def landing_page(request):
         'available_terms_for_year': available_terms_for_year,
         'course_filters_json': course_filters_json,
         'numbers_by_code_json': numbers_by_code_json,
+        'calendar_url': calendar_url,
+    })
+
+# --- AJAX: computed timetable layout for the landing page filters, rendered client-side by index.js ---
+@cache_control(private=True, no_cache=True)
+@login_required(login_url='accounts:ldap_login')
+@schedule_condition
+@require_GET
+def timetable_layout(request):
+    filters = timetable_filters(request.GET)
+    if not filters["year"] or not filters["terms"]:
+        return JsonResponse({"error": "You have to select both Academic Year and Term."}, status=400)
+
+    timetable = computed_timetable(filters)
+    courses, invalid_courses = timetable["courses"], timetable["invalid_courses"]
+
+    def safe_name(obj):
+        return getattr(obj, "name", "") or "None"
+
+    items = [{
+        "id":      c.id,
+        "code":    c.code.name,
+        "number":  c.number.name,
+        "section": c.section.name,
+        "year":    c.academic_year.name,
+        "term":    c.term.name,
+        "start":   c.start_time.name,
+        "end":     c.end_time.name,
+        "color":   c.code.color,
+        "hour":    f"{c.start_time.minutes_since_midnight // 60:02d}",
+        "top":     c.offset_top,
+        "height":  c.pixel_height,
+        # one entry per day the course meets on: [day, width %, z-index, overlaps]
+        "days":    [[d, c.day_data[d]["width"], c.day_data[d]["z"], c.day_data[d]["overlap"]] for d in c.day_names],
+    } for c in courses]
+
+    invalid = [{
+        "code":    safe_name(c.code),
+        "number":  safe_name(c.number),
+        "section": safe_name(c.section),
+        "year":    safe_name(c.academic_year),
+        "term":    safe_name(c.term),
+    } for c in invalid_courses]
+
+    return JsonResponse({"hours": HOUR_LIST, "courses": items, "invalid": invalid,
+                         "calendar_url": calendar_feed_url(request, filters)})
+
+# --- Download: the landing page grid as an .xlsx workbook, one sheet per selected term ---
+@cache_control(private=True, no_cache=True)
+@login_required(login_url='accounts:ldap_login')
+@require_GET
+def export_timetable(request):
+    filters = timetable_filters(request.GET)
+    if not filters["year"] or not filters["terms"]:
+        messages.error(request, "You have to select both Academic Year and Term.")
+        return redirect("scheduler:landing_page")
+
+    def safe_name(obj):
+        return getattr(obj, "name", "") or "None"
+
+    def term_sheets():
+        # each term is laid out on its own, so overlaps only come from courses on the same sheet
+        for term in sorted(set(filters["terms"])):
+            timetable = computed_timetable({**filters, "terms": [term]})
+            cards = [{
+                "text":  f"{c.code.name} {c.number.name} {c.section.name}\n{c.start_time.name}-{c.end_time.name}",
+                "color": c.code.color,
+                "start": c.start_time.minutes_since_midnight,
+                "end":   c.end_time.minutes_since_midnight,
+                "days":  {d: entry_depth(c.day_data[d]) for d in c.day_names},
+            } for c in timetable["courses"]]
+            invalid = [[safe_name(c.code), safe_name(c.number), safe_name(c.section),
+                        safe_name(c.term), safe_name(c.academic_year)] for c in timetable["invalid_courses"]]
+            yield term, cards, invalid
+
+    workbook = write_timetable_xlsx(term_sheets(), HOUR_LIST)
+    filename = f"timetable_{filters['year']}_{'_'.join(sorted(set(filters['terms'])))}.xlsx"
+    return FileResponse(workbook, as_attachment=True, filename=filename)
+
+# helper: a subscription URL for the timetable filters; calendar clients can't log in, so the filters are signed
+def calendar_feed_url(request, filters):
+    params = {"year": filters["year"], "term": sorted(set(filters["terms"])),
+              "pname": filters["pname"], "plevel": filters["plevel"],
+              "course_filters_json": json.dumps(filters["course_filters"])}
+    # the subscriber is in the token, so the feed stops when their account is deactivated
+    token = signing.dumps({"user": request.user.pk, "filters": params}, salt=CALENDAR_FEED_SALT, compress=True)
+    return request.build_absolute_uri(reverse("scheduler:timetable_calendar") + "?" + urlencode({"feed": token}))
+
+# decorator: a logged-in user's own filters, or a signed ?feed= token from calendar_feed_url that
+# is younger than TIMETABLE_CALENDAR_FEED_MAX_AGE and whose user is still active
+def calendar_feed_access(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = request.GET.get("feed")
+        if token:
+            max_age = getattr(settings, "TIMETABLE_CALENDAR_FEED_MAX_AGE", CALENDAR_FEED_MAX_AGE)
+            try:
+                payload = signing.loads(token, salt=CALENDAR_FEED_SALT, max_age=max_age)
+                user, params = payload["user"], payload["filters"]
+            except (signing.BadSignature, KeyError, TypeError):  # SignatureExpired is a BadSignature
+                raise Http404("Unknown calendar feed.")
+            if not User.objects.filter(pk=user, is_active=True).exists():
+                raise Http404("Unknown calendar feed.")
+            request.calendar_params = QueryDict(urlencode(params, doseq=True))
+        elif request.user.is_authenticated:
+            request.calendar_params = request.GET
+        else:
+            return redirect_to_login(request.get_full_path(), reverse("accounts:ldap_login"))
+        return view(request, *args, **kwargs)
+    return wrapper
+
+# --- Download / subscription: the filtered timetable as an iCalendar feed ---
+@cache_control(private=True, no_cache=True)
+@require_GET
+@calendar_feed_access
+@schedule_condition
+def timetable_calendar(request):
+    """
+    One weekly recurring event per course-day (see scheduler/ical.py). Pollers get
+    304s from the version ETag, and full bodies are kept in the cache per schedule
+    version and filter set, so a repeated fetch costs one cache read.
+    """
+    filters = timetable_filters(request.calendar_params)
+    if not filters["year"] or not filters["terms"]:
+        return HttpResponseBadRequest("You have to select both Academic Year and Term.")
+
+    # the event UIDs carry the host, so a body is only reused for the host it was built for
+    host = request.get_host()
+    digest = hashlib.sha256(repr((host, layout_cache_key(filters))).encode()).hexdigest()
+    key = f"scheduler:calendar:{schedule_version()}:{digest}"
+    name = " ".join([filters["pname"], filters["plevel"], filters["year"], *sorted(set(filters["terms"]))]).strip()
+    body = cache.get(key)
+    if body is not None:
+        response = HttpResponse(body, content_type="text/calendar; charset=utf-8")
+    else:
+        lines = calendar_lines(timetable_queryset(filters).distinct(), f"Timetable {name}", host)
+        response = StreamingHttpResponse(cached_stream(key, lines), content_type="text/calendar; charset=utf-8")
+    response["Content-Disposition"] = 'inline; filename="timetable.ics"'
+    return response
+
+# --- AJAX: alternative placements for one course, ranked by clashes with the courses in its programs ---
+@cache_control(private=True, no_cache=True)
+@login_required(login_url='accounts:ldap_login')
+@schedule_condition
+@require_GET
+def suggest_slots(request, course_id):
+    """
+    Rank (days, start, end) placements built from the existing CourseTime rows by
+    how many courses in the same programs (same year and term) each would clash with.
+    Candidates keep the course's length and number of meeting days. Other sections
+    of the same code and number are alternatives, not clashes, so they are ignored.
+    """
+    course = get_object_or_404(
+        Course.objects.select_related("code", "number", "section", "start_time", "end_time"),
+        id=course_id,
+    )
+    if course_bitmap(course) is None:
+        return JsonResponse({"error": "The course needs days and a valid start and end time."}, status=400)
+    start, end = course.start_time.minutes_since_midnight, course.end_time.minutes_since_midnight
+    days = expand_days(course)
+
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 100)
+    except ValueError:
+        limit = 20
+
+    peers = list(
+        Course.objects
+        .filter(programs__in=course.programs.all(),
+                academic_year_id=course.academic_year_id,
+                term_id=course.term_id)
+        .exclude(pk=course.pk)
+        .exclude(code_id=course.code_id, number_id=course.number_id)
+        .select_related("code", "number", "section", "start_time", "end_time")
+        .distinct()
+    )
+    peer_bitmaps = [(p, bitmap) for p in peers if (bitmap := course_bitmap(p)) is not None]
+
+    # every CourseTime pair with the course's length, nearest to its current start first
+    times = {t.minutes_since_midnight: t for t in CourseTime.objects.exclude(minutes_since_midnight=None)}
+    duration = end - start
+    pairs = sorted(
+        ((times[m], times[m + duration]) for m in times if m + duration in times),
+        key=lambda pair: (abs(pair[0].minutes_since_midnight - start), pair[0].minutes_since_midnight),
+    )
+    patterns = sorted(day_patterns(len(days)), key=lambda p: p != days)
+    candidates = [
+        ((p, s, e), week_bitmap(p, s.minutes_since_midnight, e.minutes_since_midnight))
+        for s, e in pairs
+        for p in patterns
+    ]
+
+    def label(c):
+        return " ".join(getattr(obj, "name", "") or "None" for obj in (c.code, c.number, c.section))
+
+    current = rank_placements([(None, course_bitmap(course))], peer_bitmaps)[0]
+    ranked = rank_placements(candidates, peer_bitmaps, limit=limit)
+
+    return JsonResponse({
+        "course": {
+            "id": course.id,
+            "label": label(course),
+            "days": days,
+            "start": course.start_time.name,
+            "end": course.end_time.name,
+            "conflicts": current[1],
+        },
+        "peers": len(peer_bitmaps),
+        "candidates": len(candidates),
+        "suggestions": [{
+            "days": p,
+            "start": s.name,
+            "end": e.name,
+            "start_time_id": s.id,
+            "end_time_id": e.id,
+            "conflicts": conflicts,
+            "overlap_minutes": overlap,
+            "clashes_with": [label(c) for c in clashing],
+        } for (p, s, e), conflicts, overlap, clashing in ranked],
     })
 
 def redirect_root(request):
@@ -328,88 +537,126 @@ def redirect_root(request):
         return redirect('scheduler:landing_page')
     return redirect('accounts:ldap_login')
 
-@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+# helper: the view_courses filters read from a GET querydict, and the matching courses
+# (None when no academic year is selected; the search requires one)
+def search_courses(params):
+    query = {
+        "code_query": params.get("code", "").strip(),
+        "number_query": params.get("number", "").strip(),
+        "section_query": params.get("section", "").strip(),
+        "term_query": params.getlist("term", ""),
+        "year_query": params.getlist("year", ""),
+        "day_query": params.getlist("day", ""),
+    }
+    if not query["year_query"]:
+        return None, query
+
+    # filters and order read the CourseSearch projection (one join, indexed) instead of five lookup joins
+    courses = (Course.objects.all()
+    .select_related("code", "number", "section", "term", "academic_year", "start_time", "end_time")
+    .order_by("search__code", "search__number", "search__section", "search__academic_year", "search__term"))
+
+    # Filters
+    courses = courses.filter(search__academic_year__in=query["year_query"])
+    if query["code_query"]:
+        courses = courses.filter(search__code=query["code_query"])
+    if query["number_query"]:
+        courses = courses.filter(search__number=query["number_query"])
+    if query["section_query"]:
+        courses = courses.filter(search__section=query["section_query"])
+    if query["term_query"]:
+        courses = courses.filter(search__term__in=query["term_query"])
+    if query["day_query"]:
+        # Any selected day matches: bitwise test on day_mask, no M2M join
+        courses = (courses
+                   .alias(day_hits=F("search__day_mask").bitand(day_mask_for(query["day_query"])))
+                   .filter(day_hits__gt=0))
+    return courses, query
+
+# helper: the number of courses a search matches, cached per filter set and data version;
+# counted only with compute, otherwise None unless an earlier request counted it
+def search_total(courses, query, compute=False):
+    digest = hashlib.sha256(json.dumps(query, sort_keys=True).encode()).hexdigest()
+    key = f"scheduler:course_search_total:{schedule_version()}:{digest}"
+    if not compute:
+        return cache.get(key)
+    return cache.get_or_set(key, courses.count, timeout=24 * 60 * 60)
+
+
+@cache_control(private=True, no_cache=True)
 @login_required(login_url='accounts:ldap_login')
+@schedule_condition
 def view_courses(request):
     submitted = "search" in request.GET
 
-    # Queries
-    code_query = request.GET.get("code", "").strip()
-    number_query = request.GET.get("number", "").strip()
-    section_query = request.GET.get("section", "").strip()
-    term_query = request.GET.getlist("term", "")
-    year_query = request.GET.getlist("year", "")
-    day_query  = request.GET.getlist("day", "")
-    courses = Course.objects.none()
-    page_obj = None
+    courses, query = search_courses(request.GET)
+    page = None
+    total = None
     
     if submitted:
 
-        if not year_query:
+        if courses is None:
             messages.error(request, "You have to select Academic Year.")
         else:
-            courses = (Course.objects.all()
-            .prefetch_related("day")
-            .order_by("code__name", "number__name", "section__name", "academic_year__name", "term__name"))
-
-            # Filters
-            if year_query:
-                courses = courses.filter(academic_year__name__in=year_query)
-            if code_query:
-                courses = courses.filter(code__name__exact=code_query)
-            if number_query:
-                courses = courses.filter(number__name__exact=number_query)
-            if section_query:
-                courses = courses.filter(section__name__exact=section_query)
-            if term_query:
-                courses = courses.filter(term__name__in=term_query)
-            if day_query:
-                # Any selected day matches
-                # distinct avoids dup rows from the M2M join
-                courses = courses.filter(day__name__in=day_query).distinct()
-
-            # Pagination
-            paginator = Paginator(courses, 20)
-            page_number = request.GET.get("page")
-            page_obj = paginator.get_page(page_number)
-
-            for c in page_obj.object_list:
+            # Keyset pagination: a signed cursor instead of a page number, so no COUNT(*) or OFFSET per page
+            cursor = request.GET.get("cursor")
+            page = keyset_page(courses, cursor)
+            # an exact COUNT(*) of a broad search costs more than the page, so it only runs on request
+            total = search_total(courses, query, compute="count" in request.GET)
+
+            for c in page["object_list"]:
                 c.day_names = expand_days(c)
 
     # Build terms
-    all_terms = CourseTerm.objects.values_list("name", flat=True).distinct()
+    all_terms = [t.name for t in lookup_cache.rows(CourseTerm.objects.all())]
     dropdown_terms = sorted({t for t in all_terms})
 
     # Build years
-    all_years = CourseYear.objects.values_list("name", flat=True).distinct()
+    all_years = [y.name for y in lookup_cache.rows(CourseYear.objects.all())]
     dropdown_years = sorted({y for y in all_years})
 
     # Build days
-    all_days = CourseDay.objects.values_list("name", flat=True).distinct()
+    all_days = [d.name for d in lookup_cache.rows(CourseDay.objects.all())]
     order = ["Mon", "Tues", "Wed", "Thurs", "Fri"]
     dropdown_days = sorted(all_days, key=lambda d: order.index(d))
 
     querydict = request.GET.copy()
-    if "page" in querydict:
-        querydict.pop("page")
+    for param in ("cursor", "page", "count"):
+        querydict.pop(param, None)
     querystring = querydict.urlencode()
 
     return render(request, "timetable/view_courses.html", {
-        "courses": page_obj,
-        "page_obj": page_obj,
+        "courses": page["object_list"] if page else None,
+        "page": page,
+        "total": total,
         "terms": dropdown_terms,
         "years": dropdown_years,
         "days": dropdown_days,
         "querystring": querystring,
-        "code_query": code_query,
-        "number_query": number_query,
-        "section_query": section_query,
-        "term_query": term_query,
-        "year_query": year_query,
-        "day_query": day_query,
+        **query,
         "submitted": submitted,
     })
 
+@cache_control(private=True, no_cache=True)
+@login_required(login_url='accounts:ldap_login')
+@require_GET
+def export_courses(request):
+    """
+    Download every course matching the view_courses filters, as CSV (default)
+    or XLSX with ?format=xlsx. Both are streamed; see scheduler/exporter.py.
+    """
+    courses, query = search_courses(request.GET)
+    if courses is None:
+        messages.error(request, "You have to select Academic Year.")
+        return redirect("scheduler:view_courses")
+
+    filename = "courses_" + "_".join(query["year_query"])
+    if request.GET.get("format") == "xlsx":
+        return FileResponse(write_xlsx(export_rows(courses)), as_attachment=True, filename=f"{filename}.xlsx")
+    response = StreamingHttpResponse(stream_csv(export_rows(courses)), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
 # helper: append error based on error types
 def _summarize_form_errors(form):
     parts = []
@@ -475,15 +722,14 @@ def delete_course(request, course_id):
     def get_days(days):
         if not days:
             return "None"
-        order = ["Mon", "Tues", "Wed", "Thurs", "Fri"]
-        return ",".join(sorted(days, key=lambda d: order.index(d)))
+        return ",".join(days)
 
     details = {
         "code":          safe_name(course.code),
         "number":        safe_name(course.number),
         "section":       safe_name(course.section),
         "term":          safe_name(course.term),
-        "day":           get_days([d.name for d in course.day.all()]),
+        "day":           get_days(expand_days(course)),
         "start_time":    safe_name(course.start_time),
         "end_time":      safe_name(course.end_time),
         "academic_year": safe_name(course.academic_year),
@@ -499,6 +745,47 @@ def delete_course(request, course_id):
         "details": details,
     })
 
+@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@login_required(login_url='accounts:ldap_login')
+def import_courses(request):
+    """
+    Upload a .csv/.xlsx schedule. With "dry run" checked (the default) only the
+    validation preview is shown; otherwise the rows are imported in one transaction,
+    and only when every row is valid. "Sync" updates courses that already exist
+    instead of rejecting them, and "delete missing" also removes the courses of
+    the file's years/terms that it no longer lists.
+    """
+    context = {"dry_run": True}
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        dry_run = "dry_run" in request.POST
+        sync = "sync" in request.POST
+        delete_missing = sync and "delete_missing" in request.POST
+        context.update({"dry_run": dry_run, "sync": sync, "delete_missing": delete_missing})
+        if upload is None:
+            messages.error(request, "You have to select a file.")
+        else:
+            try:
+                plan = plan_import(read_schedule(upload, upload.name), sync=sync, delete_missing=delete_missing)
+            except ScheduleImportError as exc:
+                messages.error(request, f"Import failed: {exc}")
+            else:
+                if not dry_run and not plan["errors"]:
+                    result = apply_import(plan)
+                    messages.success(request, f"Created {result['created']}, updated {result['updated']} "
+                                              f"and deleted {result['deleted']} courses.")
+                    return redirect("scheduler:view_courses")
+                if plan["errors"] and not dry_run:
+                    messages.error(request, "Import failed: fix the rows with errors and upload again.")
+                context.update({
+                    "plan": plan,
+                    "filename": upload.name,
+                    "preview": preview_rows(plan),
+                    "error_rows": list(plan["errors"].items())[:200],
+                })
+
+    return render(request, "timetable/course_import.html", context)
+
 def _log_history(topic, user, action, before_value="", after_value=""):
     HistoryLog.objects.create(
         topic=topic,
@@ -1245,8 +1532,9 @@ def program_name_delete(request, pk):
     return redirect("scheduler:program_name")
 
 # --- AJAX: year levels available for a given program name ---
-@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@cache_control(private=True, no_cache=True)
 @login_required(login_url='accounts:ldap_login')
+@schedule_condition
 @require_GET
 def ajax_levels_for_program(request):
     program_name = request.GET.get("program", "").strip()
@@ -1264,8 +1552,9 @@ def ajax_levels_for_program(request):
     )
     return JsonResponse({"levels": list(levels)})
 
-@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@cache_control(private=True, no_cache=True)
 @login_required(login_url='accounts:ldap_login')
+@schedule_condition
 def requirements(request):
     """
     Renders the Requirements page with two required filters:
@@ -1276,8 +1565,7 @@ def requirements(request):
     linked to that program, or “No such program exists.”
     """
     # dynamic dropdown data
-    program_names = ProgramName.objects.order_by("name")
-    year_levels = ProgramYearLevel.objects.order_by("name")
+    program_names = lookup_cache.rows(ProgramName.objects.order_by("name"))
 
     # read selection (GET)
     selected_program_name = request.GET.get("program", "").strip()
@@ -1327,11 +1615,10 @@ def requirements(request):
                 not_found = True
                 courses = []
 
-    course_codes = CourseCode.objects.order_by("name")
+    course_codes = lookup_cache.rows(CourseCode.objects.order_by("name"))
 
     return render(request, "timetable/requirements.html", {
         "program_names": program_names,
-        "year_levels": year_levels,
         "selected_program_name": selected_program_name,  
         "selected_level_name": selected_level_name,      
         "submitted": submitted,
@@ -1373,8 +1660,9 @@ def requirements_detach_course(request):
     return redirect(url)
 
 # --- AJAX: numbers available for a given code ---
-@cache_control(no_cache=True, no_store=True, must_revalidate=True)
+@cache_control(private=True, no_cache=True)
 @login_required(login_url='accounts:ldap_login')
+@schedule_condition
 @require_GET
 def ajax_numbers_for_code(request):
     code_name = request.GET.get("code", "").strip()
@@ -1389,6 +1677,91 @@ def ajax_numbers_for_code(request):
             .distinct())
     return JsonResponse({"numbers": list(nums)})
 
+# --- AJAX: "CODE NUMBER SECTION" typeahead, served from the per-process prefix index ---
+@cache_control(private=True, no_cache=True)
+@login_required(login_url='accounts:ldap_login')
+@schedule_condition
+@require_GET
+def course_typeahead(request):
+    try:
+        limit = min(max(int(request.GET.get("limit", TYPEAHEAD_LIMIT)), 1), 50)
+    except ValueError:
+        limit = TYPEAHEAD_LIMIT
+    results = course_index.search(request.GET.get("q", ""), limit)
+    return JsonResponse({"results": [
+        {"label": " ".join(filter(None, (code, number, section))), "code": code, "number": number, "section": section}
+        for code, number, section in results
+    ]})
+
+# --- AJAX: clash-free section combinations for a program's required courses in one term ---
+@cache_control(private=True, no_cache=True)
+@login_required(login_url='accounts:ldap_login')
+@schedule_condition
+@require_GET
+def requirements_combinations(request):
+    """
+    Enumerate picks of one section per required (code, number) of a program that a
+    student could take together in the given year and term. Only the program's
+    sections offered in that term count; sections without days or times are skipped.
+    Stops after `limit` combinations or `budget_ms` milliseconds.
+    """
+    program_name = request.GET.get("program", "").strip()
+    level_name = request.GET.get("level", "").strip()
+    year_name = request.GET.get("year", "").strip()
+    term_name = request.GET.get("term", "").strip()
+    if not (program_name and level_name and year_name and term_name):
+        return JsonResponse({"error": "You have to select Program Name, Program Year Level, Academic Year and Term."},
+                            status=400)
+
+    def bounded(param, default, upper):
+        try:
+            return min(max(int(request.GET.get(param, default)), 1), upper)
+        except ValueError:
+            return default
+
+    limit = bounded("limit", COMBINATION_LIMIT, COMBINATION_LIMIT_MAX)
+    budget_ms = bounded("budget_ms", COMBINATION_BUDGET_MS, COMBINATION_BUDGET_MS_MAX)
+
+    program = get_object_or_404(Program, name__name=program_name, year_level__name=level_name)
+    sections = (program.courses
+                .filter(academic_year__name=year_name, term__name=term_name)
+                .select_related("code", "number", "section", "start_time", "end_time")
+                .order_by("code__name", "number__name", "section__name"))
+
+    # one group of schedulable sections per required (code, number)
+    groups, unschedulable = {}, set()
+    for c in sections:
+        key = (getattr(c.code, "name", "") or "None", getattr(c.number, "name", "") or "None")
+        bitmap = course_bitmap(c)
+        if bitmap is None:
+            unschedulable.add(key)
+            continue
+        groups.setdefault(key, []).append((getattr(c.section, "name", "") or "None", bitmap))
+    keys = sorted(groups)
+    unschedulable = sorted(unschedulable - set(keys))
+
+    started = time.perf_counter()
+    if unschedulable:
+        # a required course with no placeable section rules out every combination
+        result = {"combinations": [], "exhausted": True, "timed_out": False}
+    else:
+        result = find_combinations([groups[k] for k in keys], limit=limit, time_budget=budget_ms / 1000)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    return JsonResponse({
+        "courses": [f"{code} {number}" for code, number in keys],
+        "unschedulable": [f"{code} {number}" for code, number in unschedulable],
+        "combinations": [
+            [{"course": f"{code} {number}", "sections": picked}
+             for (code, number), picked in zip(keys, combination)]
+            for combination in result["combinations"]
+        ],
+        "count": len(result["combinations"]),
+        "exhausted": result["exhausted"],
+        "timed_out": result["timed_out"],
+        "elapsed_ms": round(elapsed_ms, 1),
+    })
+
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
 @login_required(login_url='accounts:ldap_login')
 @require_POST
@@ -0,0 +1,85 @@
+'''
+Test helpers shared by the apps' test suites.
+'''
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+
+from scheduler.caching import layout_cache, schedule_version
+from scheduler.models import Course, Profile, Program, ProgramName, ProgramYearLevel, Role
+
+
+class QueryBudgetMixin:
+    """
+    Requests every URL of an app at two data sizes and asserts that the query
+    count does not grow with the data, so a new N+1 fails the build.
+
+    Subclasses set `namespace`, `cases` ({url name: (method, args, params)};
+    args may be a callable returning the URL args) and `excluded` ({url name:
+    reason}). Every URL in the namespace must appear in one of the two.
+
+    Each request runs in a savepoint that is rolled back, so writes (renames,
+    deletes) hit the same seeded rows at both sizes, and its on_commit
+    callbacks (bulk reslug, version bump) run inside the measurement.
+    """
+    namespace = None
+    cases = {}
+    excluded = {}
+    SMALL, LARGE = 30, 300
+
+    def setUp(self):
+        self.user = User.objects.create_user("budget")
+        Profile.objects.create(user=self.user, role=Role.objects.get_or_create(name="Admin")[0])
+        self.client.force_login(self.user)
+        self.program = Program.objects.create(
+            name=ProgramName.objects.create(name="Budget Program"),
+            year_level=ProgramYearLevel.objects.get_or_create(name="1")[0],
+        )
+
+    def seed(self, size):
+        call_command("seed_schedule", courses=size - Course.objects.count(), programs=2, history=size,
+                     stdout=StringIO())
+        self.program.courses.set(Course.objects.all())
+        schedule_version()  # the version's cache row, as after any earlier request
+        role = Role.objects.get_or_create(name="User")[0]
+        for i in range(User.objects.count(), size // 10):
+            Profile.objects.create(user=User.objects.create_user(f"user{i:04d}"), role=role)
+
+    def count_queries(self, name):
+        method, args, params = self.cases[name]
+        url = reverse(f"{self.namespace}:{name}", args=args() if callable(args) else args)
+        # warm up once so first-use work (session, cache rows) is not counted
+        self.request(method, url, params)
+        # computed layouts are cached per process and data version; always measure the full request
+        layout_cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.request(method, url, params)
+        # writes answer with a redirect back to their list page
+        self.assertIn(response.status_code, (200, 302), f"{method.upper()} {url}")
+        return len(ctx.captured_queries)
+
+    def request(self, method, url, params):
+        with transaction.atomic():
+            with self.captureOnCommitCallbacks(execute=True):
+                response = getattr(self.client, method)(url, params)
+            transaction.set_rollback(True)
+        return response
+
+    def test_every_url_is_budgeted(self):
+        names = {
+            pattern.name
+            for pattern in get_resolver().namespace_dict[self.namespace][1].url_patterns
+        }
+        self.assertEqual(names - set(self.cases) - set(self.excluded), set())
+
+    def test_query_count_is_independent_of_data_size(self):
+        self.seed(self.SMALL)
+        small = {name: self.count_queries(name) for name in self.cases}
+        self.seed(self.LARGE)
+        for name in self.cases:
+            with self.subTest(url=name):
+                self.assertEqual(self.count_queries(name), small[name])